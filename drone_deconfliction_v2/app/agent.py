@@ -1,46 +1,96 @@
-from .models import Mission, Waypoint, Conflict
+from .models import Mission, Conflict, ConflictEpisode, OVB, OVBBatch
 from .trajectory_model import generate_ovbs
-from .conflict_detector import detect_conflicts_between_ovbs
+from .conflict_detector import conflicts_from_pairs, merge_episodes
 from .optimizer import resolve_with_delay
-from typing import List, Dict
-from app.utils.spatial_index import build_spatial_index, spatial_query
-from app.trajectory_model import detect_conflicts
+from typing import List
+from app.utils.spatial_index import spatial_query
+from app.utils.broad_phase import BroadPhase
+import numpy as np
 
 class DroneAgent:
-    def __init__(self, mission: Mission, use_bezier: bool = False):
+    def __init__(self, mission: Mission, use_bezier: bool = False, broad_phase: str = "rtree",
+                 conflict_model: str = "box"):
         self.mission = mission
+        self.use_bezier = use_bezier
+        self.broad_phase = broad_phase  # backend used for indexes built for this agent
+        self.conflict_model = conflict_model  # narrow phase: "box" or "cpa" (closest approach)
         self.ovbs = generate_ovbs(mission.id, mission.waypoints, use_bezier=use_bezier)
         self.conflicts: List[Conflict] = []
         self.resolved = False
         self.delay = 0.0
 
-    def check_conflict_against(self, rtree_index, id_map, exclude_ids: List[str]):
+    def check_conflict_against(self, rtree_index, id_map, exclude_ids: List[str],
+                               z_buffer: float = 0.0, t_buffer: float = 0.0, detector=None):
+        """
+        Conflicts of this agent's boxes with the boxes in id_map, pruned by
+        `rtree_index` (an R-tree or a BroadPhase). With a ShardedDetector as
+        `detector`, the detector does its own tiling over every box in id_map
+        and `rtree_index` is unused; it only runs the box model, so a "cpa"
+        agent raises ValueError there.
+        """
+        if detector is not None and self.conflict_model != "box":
+            raise ValueError(f"detector= only supports the box conflict model, not '{self.conflict_model}'")
         if self.resolved:
             return
     
         self.conflicts.clear()
-        for ovb in self.ovbs:
-            candidate_ids = spatial_query(ovb, rtree_index)
-            for cid in candidate_ids:
-                ob = id_map[cid]
-                if ob.drone_id in exclude_ids:  # skip self
-                    continue
-                
-                if abs(ovb.center[2] - ob.center[2]) > 40:
-                    continue
-                if abs(ovb.entry_time - ob.exit_time) > 30:
-                    continue
-                
-                results = detect_conflicts([ovb], [ob])
-                self.conflicts.extend(results)
+        if detector is not None:
+            # Tile-sharded detection (app/sharded_detector.py) over every box in id_map
+            traffic = OVBBatch.from_ovbs([ob for ob in id_map.values() if ob.drone_id not in exclude_ids])
+            own = OVBBatch.from_ovbs(self.ovbs)
+            self.conflicts.extend(detector.detect(own, traffic, z_buffer, t_buffer))
+            return
+
+        if isinstance(rtree_index, BroadPhase):
+            # All of this agent's boxes in one broad-phase call
+            hit_rows, keys = rtree_index.query_pairs(self.ovbs, z_buffer, t_buffer)
+            pairs = zip(hit_rows.tolist(), keys.tolist())
+        else:
+            # A 3D/4D index already prunes boxes at other levels and times
+            pairs = (
+                (i, cid)
+                for i, ovb in enumerate(self.ovbs)
+                for cid in spatial_query(ovb, rtree_index, z_buffer, t_buffer)
+            )
+
+        rows, candidates = [], []
+        for i, cid in pairs:
+            ob = id_map[cid]
+            if ob.drone_id in exclude_ids:  # skip self
+                continue
+            rows.append(i)
+            candidates.append(ob)
+        self._check_candidates(rows, candidates)
+
+    def check_conflict_in(self, airspace):
+        """
+        check_conflict_against through an AirspaceRegistry's own query_pairs,
+        so its lock and buffers apply and a HorizonRegistry's cold boxes count.
+        """
+        if self.resolved:
+            return
+        self.conflicts.clear()
+        rows, candidates = airspace.query_pairs(self.ovbs, exclude_ids=[self.mission.id])
+        self._check_candidates(rows, candidates)
+
+    def _check_candidates(self, rows: List[int], candidates: List[OVB]):
+        # One vectorized narrow phase over every candidate pair
+        own = OVBBatch.from_ovbs(self.ovbs)
+        others = OVBBatch.from_ovbs(candidates)
+        self.conflicts.extend(conflicts_from_pairs(own, others, rows, np.arange(len(candidates)), self.conflict_model))
     
     
+    def apply_delay(self, delay: float):
+        self.mission.shift_times(delay)
+        self.ovbs = generate_ovbs(self.mission.id, self.mission.waypoints, use_bezier=self.use_bezier)
+
+    @property
+    def episodes(self) -> List[ConflictEpisode]:
+        return merge_episodes(self.conflicts)
+
     def resolve_conflict(self):
-        self.delay = resolve_with_delay(self.mission, self.conflicts)
+        self.delay = resolve_with_delay(self.mission, self.episodes)
         self.resolved = self.delay >= 0
         if self.resolved:
-            # Apply delay to all waypoints
-            for wp in self.mission.waypoints:
-                wp.t += self.delay
-            self.ovbs = generate_ovbs(self.mission.id, self.mission.waypoints)
+            self.apply_delay(self.delay)
         return self.resolved
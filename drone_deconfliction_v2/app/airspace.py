@@ -0,0 +1,303 @@
+# app/airspace.py
+
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+import math
+import threading
+from app.models import OVB, OVBBatch, Waypoint
+from app.trajectory_model import generate_ovbs
+from app.utils.broad_phase import SweepAndPruneBroadPhase, make_broad_phase
+
+
+class AirspaceRegistry:
+    """
+    Long-lived store of the OVBs of every registered mission.
+
+    The index stays warm between requests: registering, updating or
+    withdrawing a mission only inserts/deletes that drone's boxes, so a
+    query costs O(primary route) instead of O(fleet). A lock serializes
+    index access so request threads can share one registry. `backend`
+    picks the broad phase ("rtree", "grid", "sap" or "envelope", see
+    app/utils/broad_phase.py); `options` go to its constructor.
+    """
+
+    def __init__(self, dimension: int = 4, z_buffer: float = 0.0, t_buffer: float = 0.0,
+                 backend: str = "rtree", **options):
+        self.dimension = dimension
+        self.z_buffer = z_buffer
+        self.t_buffer = t_buffer
+        self.backend = backend
+        if backend == "rtree":
+            options.setdefault("dimension", dimension)
+        self.index = make_broad_phase(backend, **options)
+        self.id_map: Dict[int, OVB] = {}
+        self._box_ids: Dict[str, List[int]] = {}
+        self._next_id = 0
+        self._snapshot = None
+        self._lock = threading.RLock()
+
+    def __contains__(self, drone_id: str) -> bool:
+        return drone_id in self._box_ids
+
+    def __len__(self) -> int:
+        return len(self._box_ids)
+
+    @property
+    def drone_ids(self) -> List[str]:
+        return list(self._box_ids)
+
+    @property
+    def box_count(self) -> int:
+        return len(self.id_map)
+
+    def ovbs_for(self, drone_id: str) -> List[OVB]:
+        return [self.id_map[i] for i in self._box_ids[drone_id]]
+
+    def snapshot(self) -> OVBBatch:
+        """Every registered box as one batch; rebuilt only after the registry changed."""
+        with self._lock:
+            if self._snapshot is None:
+                self._snapshot = OVBBatch.from_ovbs(list(self.id_map.values()))
+            return self._snapshot
+
+    def insert_ovbs(self, drone_id: str, ovbs: Iterable[OVB]) -> int:
+        with self._lock:
+            ids = self._box_ids.setdefault(drone_id, [])
+            self._snapshot = None
+            count = 0
+            for ovb in ovbs:
+                box_id = self._next_id
+                self._next_id += 1
+                self.index.insert(box_id, ovb)
+                self.id_map[box_id] = ovb
+                ids.append(box_id)
+                count += 1
+            return count
+
+    def register(self, drone_id: str, waypoints: List[Waypoint], width: float = 20.0,
+                 use_bezier: bool = False) -> List[OVB]:
+        ovbs = generate_ovbs(drone_id, waypoints, width=width, use_bezier=use_bezier)
+        with self._lock:
+            if drone_id in self._box_ids:
+                raise ValueError(f"Mission '{drone_id}' is already registered")
+            self.insert_ovbs(drone_id, ovbs)
+        return ovbs
+
+    def update(self, drone_id: str, waypoints: List[Waypoint], width: float = 20.0,
+               use_bezier: bool = False) -> List[OVB]:
+        ovbs = generate_ovbs(drone_id, waypoints, width=width, use_bezier=use_bezier)
+        with self._lock:
+            self.withdraw(drone_id)
+            self.insert_ovbs(drone_id, ovbs)
+        return ovbs
+
+    def withdraw(self, drone_id: str) -> int:
+        """Removes every box of a mission; returns how many were deleted."""
+        with self._lock:
+            ids = self._box_ids.pop(drone_id)
+            self._snapshot = None
+            for box_id in ids:
+                del self.id_map[box_id]
+                self.index.remove(box_id)
+            return len(ids)
+
+    def replace_ovbs(self, drone_id: str, ovbs: Iterable[OVB]) -> int:
+        """Swaps a drone's boxes in place, e.g. after its mission was delayed."""
+        with self._lock:
+            if drone_id in self._box_ids:
+                self.withdraw(drone_id)
+            return self.insert_ovbs(drone_id, ovbs)
+
+    def drones_touching(self, ovbs: Iterable[OVB], exclude_ids: Iterable[str] = ()) -> Set[str]:
+        """Ids of registered drones with a box intersecting any of `ovbs`."""
+        _, candidates = self.query_pairs(list(ovbs), exclude_ids)
+        return {ob.drone_id for ob in candidates}
+
+    def query(self, ovb: OVB, exclude_ids: Iterable[str] = ()) -> List[OVB]:
+        """Registered boxes whose bounds intersect `ovb`, minus excluded drones."""
+        return self.query_pairs([ovb], exclude_ids)[1]
+
+    def query_pairs(self, ovbs: Sequence[OVB], exclude_ids: Iterable[str] = ()) -> Tuple[List[int], List[OVB]]:
+        """
+        Every (row in `ovbs`, registered box) candidate pair in one broad-phase
+        call, minus excluded drones.
+        """
+        excluded = set(exclude_ids)
+        with self._lock:
+            rows, keys = self.index.query_pairs(ovbs, self.z_buffer, self.t_buffer)
+            candidates = [self.id_map[k] for k in keys.tolist()]
+        keep = [i for i, ob in enumerate(candidates) if ob.drone_id not in excluded]
+        return [int(rows[i]) for i in keep], [candidates[i] for i in keep]
+
+
+class HorizonRegistry(AirspaceRegistry):
+    """
+    AirspaceRegistry over a sliding time window.
+
+    Boxes are bucketed by exit_time into `bucket_seconds` windows;
+    advance(now) drops every bucket that ended more than `retention`
+    seconds before `now`, and a mission whose boxes are all gone is
+    forgotten. Only boxes entering before now + `hot_horizon` live in the
+    broad-phase index; later ones wait in cold buckets (by entry_time) and
+    a sweep-and-prune table, and are promoted as the window moves. Queries
+    ending before the first cold bucket skip that table. With `clock` set,
+    queries and inserts advance to clock() first. Without advance() calls
+    it behaves like AirspaceRegistry.
+    """
+
+    def __init__(self, bucket_seconds: float = 300.0, retention: float = 0.0,
+                 hot_horizon: Optional[float] = None, clock: Optional[Callable[[], float]] = None,
+                 **options):
+        super().__init__(**options)
+        self.bucket_seconds = bucket_seconds
+        self.retention = retention
+        self.hot_horizon = hot_horizon
+        self.clock = clock
+        self.now = -math.inf
+        self.evicted = 0
+        self._started: Optional[float] = None
+        self._expiry: Dict[int, List[int]] = {}      # exit bucket -> box ids
+        self._cold: Dict[int, List[int]] = {}        # entry bucket -> box ids not yet indexed
+        self._cold_index = SweepAndPruneBroadPhase()
+        self._empty: Set[str] = set()                # missions registered with no boxes
+
+    def _bucket(self, t: float) -> int:
+        return math.floor(t / self.bucket_seconds)
+
+    def _is_cold(self, ovb: OVB) -> bool:
+        if self.hot_horizon is None or self._started is None:
+            return False
+        return ovb.entry_time > self.now + self.hot_horizon
+
+    def insert_ovbs(self, drone_id: str, ovbs: Iterable[OVB]) -> int:
+        self._tick()
+        with self._lock:
+            ids = self._box_ids.setdefault(drone_id, [])
+            self._snapshot = None
+            count, cold = 0, 0
+            for ovb in ovbs:
+                box_id = self._next_id
+                self._next_id += 1
+                if self._is_cold(ovb):
+                    self._cold.setdefault(self._bucket(ovb.entry_time), []).append(box_id)
+                    self._cold_index.insert(box_id, ovb)
+                    cold += 1
+                else:
+                    self.index.insert(box_id, ovb)
+                self._expiry.setdefault(self._bucket(ovb.exit_time), []).append(box_id)
+                self.id_map[box_id] = ovb
+                ids.append(box_id)
+                count += 1
+            if cold:
+                self._cold_index.flush()  # bounds are built here, not by the next query
+            if not ids:
+                self._empty.add(drone_id)  # nothing will expire; forgotten on the next advance
+            return count
+
+    def withdraw(self, drone_id: str) -> int:
+        with self._lock:
+            ids = self._box_ids.pop(drone_id)
+            self._snapshot = None
+            for box_id in ids:
+                del self.id_map[box_id]
+                if box_id in self._cold_index.ovbs:
+                    self._cold_index.remove(box_id)
+                else:
+                    self.index.remove(box_id)
+            # Bucket lists keep the stale ids; advance() skips them
+            return len(ids)
+
+    def advance(self, now: float) -> int:
+        """Moves the window to `now`: evicts expired buckets, promotes cold ones. Returns boxes evicted."""
+        with self._lock:
+            if now <= self.now:
+                return 0
+            if self._started is None:
+                self._started = now
+            self.now = now
+            last_expired = self._bucket(now - self.retention) - 1
+            expired = [
+                box_id
+                for bucket in [b for b in self._expiry if b <= last_expired]
+                for box_id in self._expiry.pop(bucket)
+                if box_id in self.id_map  # not withdrawn earlier
+            ]
+            evicted = len(expired)
+            promoted = []
+            if self.hot_horizon is not None:
+                last_hot = self._bucket(now + self.hot_horizon)
+                promoted = [
+                    box_id
+                    for bucket in [b for b in self._cold if b <= last_hot]
+                    for box_id in self._cold.pop(bucket)
+                    if box_id in self._cold_index.ovbs
+                ]
+            # R-tree inserts and deletes cost 15-80x a bulk-loaded box, so
+            # past 5% of the index the hot boxes are reloaded instead
+            rebuild = evicted + len(promoted) > len(self.index) // 20
+            owners = self._empty
+            self._empty = set()
+            for box_id in expired:
+                ovb = self.id_map.pop(box_id)
+                if box_id in self._cold_index.ovbs:
+                    self._cold_index.remove(box_id)
+                elif not rebuild:
+                    self.index.remove(box_id)
+                owners.add(ovb.drone_id)
+            # Each affected owner list is rebuilt once, not shrunk per box
+            for drone_id in owners:
+                owned = [i for i in self._box_ids.get(drone_id, ()) if i in self.id_map]
+                if owned:
+                    self._box_ids[drone_id] = owned
+                else:
+                    self._box_ids.pop(drone_id, None)
+            for box_id in promoted:
+                if box_id in self._cold_index.ovbs:  # may have just expired
+                    self._cold_index.remove(box_id)
+                    if not rebuild:
+                        self.index.insert(box_id, self.id_map[box_id])
+            if rebuild:
+                cold = self._cold_index.ovbs
+                self.index.load({k: ovb for k, ovb in self.id_map.items() if k not in cold})
+            if evicted:
+                self._snapshot = None
+            self.evicted += evicted
+            return evicted
+
+    def _tick(self):
+        if self.clock is not None:
+            self.advance(self.clock())
+
+    def query_pairs(self, ovbs: Sequence[OVB], exclude_ids: Iterable[str] = ()) -> Tuple[List[int], List[OVB]]:
+        self._tick()
+        rows, candidates = super().query_pairs(ovbs, exclude_ids)
+        with self._lock:
+            # Cold boxes in entry bucket b enter at or after b * bucket_seconds,
+            # so a query ending before the first cold bucket cannot meet one
+            if not self._cold or not len(ovbs):
+                return rows, candidates
+            latest = max(o.exit_time for o in ovbs) + self.t_buffer
+            if latest <= self.now + self.hot_horizon or self._bucket(latest) < min(self._cold):
+                return rows, candidates
+            cold_rows, keys = self._cold_index.query_pairs(ovbs, self.z_buffer, self.t_buffer)
+            cold = [self.id_map[k] for k in keys.tolist()]
+        excluded = set(exclude_ids)
+        for row, ob in zip(cold_rows.tolist(), cold):
+            if ob.drone_id not in excluded:
+                rows.append(row)
+                candidates.append(ob)
+        return rows, candidates
+
+    def stats(self) -> dict:
+        with self._lock:
+            span = self.now - self._started if self._started is not None else 0.0
+            return {
+                "now": self.now if self._started is not None else None,
+                "missions": len(self._box_ids),
+                "live_boxes": len(self.id_map),
+                "hot_boxes": len(self.index),
+                "cold_boxes": len(self._cold_index),
+                "buckets": len(self._expiry),
+                "evicted_boxes": self.evicted,
+                # boxes evicted per second of airspace time since the first advance
+                "eviction_rate": self.evicted / span if span > 0 else 0.0
+            }
@@ -1,16 +1,99 @@
 # app/api.py
 
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
-from typing import List, Dict
-from app.models import Waypoint, Mission, Conflict
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from fastapi.exceptions import RequestValidationError
+from pydantic import BaseModel, Field, ValidationError
+from starlette.concurrency import run_in_threadpool
+from typing import Iterator, List, Dict, Literal, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from app.models import Waypoint, Mission, Conflict, ConflictEpisode, OVBBatch
 from app.agent import DroneAgent
-from app.trajectory_model import generate_ovbs
-from app.utils.spatial_index import build_spatial_index, spatial_query
-from app.trajectory_model import detect_conflicts
+from app.fleet_detector import FleetDetector
+from app.jobs import Job, JobQueue, QueueFull
+from app.result_cache import AnalysisCache
+from app.reservations import ReservationTable
+from app.scheduler import ResolutionScheduler
+from app.airspace import AirspaceRegistry, HorizonRegistry
+from app.conflict_detector import conflicts_from_pairs, iter_conflicts_by_row, merge_episodes
+from app.columnar import MEDIA_TYPE as NPZ_MEDIA_TYPE, ColumnarRequest, decode_analyze_request
+from app.sharded_detector import ShardedDetector, drone_codes
+from app.utils.broad_phase import bounds_array, sweep_pairs
+from app.trajectory_model import generate_ovbs, generate_ovbs_batch, waypoints_to_array
+from app.what_if import sweep_offsets
+from dataclasses import asdict
+import numpy as np
+import json
+import os
+import time
 import traceback
 
-app = FastAPI()
+# Upper bound for client-requested parallelism
+MAX_WORKERS = os.cpu_count() or 1
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # Process and thread pools outlive requests; stop them with the server
+    app.state.sharded.close()
+    app.state.jobs.shutdown()
+    app.state.fleet.close()
+
+
+app = FastAPI(lifespan=lifespan)
+
+# Warm index of every registered mission, shared by all requests. Expired
+# boxes are evicted as POST /airspace/advance (or the wall clock) moves "now".
+_hot_horizon = os.environ.get("DECONFLICTION_HOT_HORIZON")
+app.state.airspace = HorizonRegistry(
+    backend=os.environ.get("DECONFLICTION_BROAD_PHASE", "rtree"),
+    bucket_seconds=float(os.environ.get("DECONFLICTION_BUCKET_SECONDS", "300")),
+    retention=float(os.environ.get("DECONFLICTION_RETENTION", "0")),
+    hot_horizon=float(_hot_horizon) if _hot_horizon else None,
+    clock=time.time if os.environ.get("DECONFLICTION_WALL_CLOCK") == "1" else None
+)
+
+# Local pool for long-running analyses, so they don't hold a request thread
+app.state.jobs = JobQueue(
+    workers=int(os.environ.get("DECONFLICTION_JOB_WORKERS", "2")),
+    max_pending=int(os.environ.get("DECONFLICTION_JOB_QUEUE", "16")),
+    ttl=float(os.environ.get("DECONFLICTION_JOB_TTL", "3600"))
+)
+
+# Per-route OVBs and per-(primary, traffic drone) conflicts of inline /analyze traffic
+app.state.results = AnalysisCache(max_bytes=int(os.environ.get("DECONFLICTION_CACHE_MB", "64")) << 20)
+
+# Voxel reservation table for O(own voxels) admission checks (/reservations)
+app.state.reservations = ReservationTable(
+    cell_size=float(os.environ.get("DECONFLICTION_VOXEL_XY", "50")),
+    z_size=float(os.environ.get("DECONFLICTION_VOXEL_Z", "20")),
+    t_size=float(os.environ.get("DECONFLICTION_VOXEL_T", "10"))
+)
+
+# Conflicts with the same drone this close in time are reported as one episode
+EPISODE_GAP = float(os.environ.get("DECONFLICTION_EPISODE_GAP", "5"))
+
+BroadPhaseName = Literal["rtree", "grid", "sap", "envelope"]
+
+# Narrow phase: box overlap + midpoint gaps, or closest point of approach
+DetectorName = Literal["box", "cpa"]
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# (primary boxes, candidate boxes, primary rows, candidate rows) of a request
+CandidatePairs = Tuple[OVBBatch, OVBBatch, np.ndarray, np.ndarray]
+
+# One tile-sharded detector for "workers" > 1; its process pool is started on
+# first use, sized by the server rather than by the request
+app.state.sharded = ShardedDetector(
+    workers=int(os.environ.get("DECONFLICTION_SHARD_WORKERS", str(MAX_WORKERS)))
+)
+
+# Fleet jobs share one FleetDetector, so its process pool outlives each job
+app.state.fleet = FleetDetector()
+FLEET_WORKERS = int(os.environ.get("DECONFLICTION_FLEET_WORKERS", "1"))
 
 
 class WaypointIn(BaseModel):
@@ -25,9 +108,57 @@ class MissionInput(BaseModel):
     buffer: float
 
 
+class MissionRegistration(BaseModel):
+    id: str
+    waypoints: List[WaypointIn]
+    buffer: float = 20.0
+
+
 class AnalyzeRequest(BaseModel):
     mission: MissionInput
-    simulated_drones: Dict[str, List[WaypointIn]]
+    # When omitted, the primary is checked against the registered airspace
+    simulated_drones: Optional[Dict[str, List[WaypointIn]]] = None
+    # Backend for indexing simulated_drones (default: the registry's)
+    broad_phase: Optional[BroadPhaseName] = None
+    # > 1: tile-sharded detection on the server's shared process pool
+    workers: int = Field(1, ge=1, le=MAX_WORKERS)
+    # Reuse cached OVBs / pair results for unchanged inline drones
+    use_cache: bool = True
+
+
+class AnalyzeBatchRequest(BaseModel):
+    candidates: List[MissionInput]
+    # Shared traffic, indexed once for all candidates (registered airspace if omitted)
+    simulated_drones: Optional[Dict[str, List[WaypointIn]]] = None
+    buffer: float = 20.0
+    # > 1: candidates are evaluated on that many threads
+    workers: int = Field(1, ge=1, le=MAX_WORKERS)
+    broad_phase: Optional[BroadPhaseName] = None
+
+
+class WhatIfRequest(BaseModel):
+    mission: MissionInput
+    # Traffic to re-check against (registered airspace if omitted)
+    simulated_drones: Optional[Dict[str, List[WaypointIn]]] = None
+    delays: List[float] = [float(d) for d in range(0, 121, 10)]
+    altitude_offsets: List[float] = [0.0]
+    delay_weight: float = 1.0      # cost per second of delay
+    altitude_weight: float = 1.0   # cost per metre of altitude change
+
+
+class FleetJobRequest(BaseModel):
+    missions: Dict[str, List[WaypointIn]]
+    priorities: Dict[str, int] = {}
+    resolve: bool = True
+    max_delay: float = 120.0
+    max_iterations: int = 20
+
+
+class JobRequest(BaseModel):
+    # "analyze": one AnalyzeRequest; "fleet": detect + resolve a whole fleet
+    kind: Literal["analyze", "fleet"]
+    analyze: Optional[AnalyzeRequest] = None
+    fleet: Optional[FleetJobRequest] = None
 
 
 class ConflictOut(BaseModel):
@@ -36,57 +167,476 @@ class ConflictOut(BaseModel):
     time: float
     actual_gap: float
     required_gap: float
+    severity: float = 0.0
+    # Set on episodes (the default /analyze output), absent with raw=true
+    start_time: Optional[float] = None
+    end_time: Optional[float] = None
+    conflict_count: Optional[int] = None
 
 
-@app.post("/analyze")
-def analyze(req: AnalyzeRequest):
-    try:
-        # Convert primary mission
-        primary_mission = Mission(
-            id="Primary",
-            waypoints=[Waypoint(**wp.dict()) for wp in req.mission.waypoints]
+def to_waypoints(wp_list: List[WaypointIn]) -> List[Waypoint]:
+    return [Waypoint(**wp.dict()) for wp in wp_list]
+
+
+def detect_against_airspace(primary_ovbs, airspace: AirspaceRegistry, workers: int = 1,
+                            raw: bool = False) -> List[dict]:
+    if workers > 1:
+        # Tile-sharded broad + narrow phase over every registered box
+        found = app.state.sharded.detect(
+            OVBBatch.from_ovbs(primary_ovbs), airspace.snapshot(), airspace.z_buffer, airspace.t_buffer
+        )
+    else:
+        # Broad phase: collect every (primary box, registered box) candidate pair
+        exclude = {ovb.drone_id for ovb in primary_ovbs}
+        rows, candidates = airspace.query_pairs(primary_ovbs, exclude_ids=exclude)
+
+        # Narrow phase: one vectorized pass over all pairs
+        found = conflicts_from_pairs(
+            OVBBatch.from_ovbs(primary_ovbs),
+            OVBBatch.from_ovbs(candidates),
+            rows,
+            np.arange(len(candidates))
         )
-        primary_ovbs = generate_ovbs("Primary", primary_mission.waypoints, width=req.mission.buffer)
-
-        # Convert simulated drones
-        all_sim_ovbs = []
-        drone_id_map = {}
-        for drone_id, wp_list in req.simulated_drones.items():
-            mission = Mission(
-                id=drone_id,
-                waypoints=[Waypoint(**wp.dict()) for wp in wp_list]
-            )
-            ovbs = generate_ovbs(drone_id, mission.waypoints, width=req.mission.buffer)
-            for ovb in ovbs:
-                drone_id_map[id(ovb)] = drone_id
-            all_sim_ovbs.extend(ovbs)
-
-        rtree_index, id_map = build_spatial_index(all_sim_ovbs)
+    return conflict_dicts(found) if raw else episode_dicts(merge_episodes(found, EPISODE_GAP))
+
+
+def conflict_dicts(found: List[Conflict]) -> List[dict]:
+    return [{
+        "with_": c.with_id,
+        "location": list(c.location),
+        "time": c.time,
+        "actual_gap": c.actual_gap,
+        "required_gap": c.required_gap,
+        "severity": c.severity
+    } for c in found]
+
+
+def episode_dicts(episodes: List[ConflictEpisode]) -> List[dict]:
+    """Same keys as conflict_dicts, plus the episode's time span and size."""
+    return [{
+        "with_": e.with_id,
+        "location": list(e.location),
+        "time": e.time,
+        "actual_gap": e.actual_gap,
+        "required_gap": e.required_gap,
+        "severity": e.severity,
+        "start_time": e.start_time,
+        "end_time": e.end_time,
+        "conflict_count": e.conflict_count
+    } for e in episodes]
+
+
+def traffic_airspace(simulated_drones: Optional[Dict[str, List[WaypointIn]]], buffer: float,
+                     broad_phase: Optional[str] = None) -> AirspaceRegistry:
+    if simulated_drones is None:
+        return app.state.airspace
+    # Ad-hoc traffic sent inline: index it just for this request
+    airspace = AirspaceRegistry(backend=broad_phase or app.state.airspace.backend)
+    for drone_id, wp_list in simulated_drones.items():
+        airspace.register(drone_id, to_waypoints(wp_list), width=buffer)
+    return airspace
+
+
+def analyze_mission(mission: MissionInput, airspace: AirspaceRegistry, primary_id: str = "Primary",
+                    workers: int = 1, raw: bool = False) -> dict:
+    primary_ovbs = generate_ovbs(primary_id, to_waypoints(mission.waypoints), width=mission.buffer)
+    conflicts = detect_against_airspace(primary_ovbs, airspace, workers, raw)
+    return {
+        "status": "conflict detected" if conflicts else "clear",
+        "conflicts": conflicts
+    }
+
+
+@app.post("/missions", status_code=201)
+def register_mission(req: MissionRegistration):
+    airspace = app.state.airspace
+    if req.id in airspace:
+        raise HTTPException(status_code=409, detail=f"Mission '{req.id}' is already registered")
+    ovbs = airspace.register(req.id, to_waypoints(req.waypoints), width=req.buffer)
+    return {"id": req.id, "ovbs": len(ovbs)}
+
+
+@app.put("/missions/{drone_id}")
+def update_mission(drone_id: str, req: MissionInput):
+    airspace = app.state.airspace
+    if drone_id not in airspace:
+        raise HTTPException(status_code=404, detail=f"Mission '{drone_id}' is not registered")
+    ovbs = airspace.update(drone_id, to_waypoints(req.waypoints), width=req.buffer)
+    return {"id": drone_id, "ovbs": len(ovbs)}
+
+
+@app.delete("/missions/{drone_id}")
+def withdraw_mission(drone_id: str):
+    airspace = app.state.airspace
+    if drone_id not in airspace:
+        raise HTTPException(status_code=404, detail=f"Mission '{drone_id}' is not registered")
+    removed = airspace.withdraw(drone_id)
+    return {"id": drone_id, "removed_ovbs": removed}
+
+
+@app.get("/missions")
+def list_missions():
+    airspace = app.state.airspace
+    return {"missions": airspace.drone_ids, "ovbs": airspace.box_count}
+
+
+@app.post("/airspace/advance")
+def advance_airspace(now: float):
+    """Moves the registry's time window to `now`, evicting expired boxes."""
+    evicted = app.state.airspace.advance(now)
+    return {"evicted": evicted, **app.state.airspace.stats()}
+
+
+@app.get("/airspace")
+def airspace_stats():
+    return app.state.airspace.stats()
+
+
+@app.post("/reservations", status_code=201)
+def admit_mission(req: MissionRegistration):
+    """Reserves the mission's voxels if it conflicts with no reservation, else 409."""
+    table = app.state.reservations
+    if req.id in table:
+        raise HTTPException(status_code=409, detail=f"Mission '{req.id}' is already reserved")
+    ovbs = generate_ovbs(req.id, to_waypoints(req.waypoints), width=req.buffer)
+    conflicts = table.admit(req.id, ovbs)
+    if conflicts:
+        raise HTTPException(status_code=409, detail={
+            "status": "conflict detected",
+            "conflicts": episode_dicts(merge_episodes(conflicts, EPISODE_GAP))
+        })
+    return {"id": req.id, "ovbs": len(ovbs)}
+
+
+@app.delete("/reservations/{drone_id}")
+def release_reservation(drone_id: str):
+    table = app.state.reservations
+    if drone_id not in table:
+        raise HTTPException(status_code=404, detail=f"Mission '{drone_id}' is not reserved")
+    return {"id": drone_id, "released_voxels": table.release(drone_id)}
+
+
+@app.delete("/reservations")
+def release_completed(before: float):
+    """Releases every reservation whose mission ended before `before`."""
+    return {"released": app.state.reservations.release_completed(before)}
+
+
+@app.get("/reservations")
+def list_reservations():
+    table = app.state.reservations
+    return {**table.stats(), "missions": table.drone_ids}
+
+
+def airspace_pairs(req: AnalyzeRequest) -> CandidatePairs:
+    airspace = traffic_airspace(req.simulated_drones, req.mission.buffer, req.broad_phase)
+    primary_ovbs = generate_ovbs("Primary", to_waypoints(req.mission.waypoints), width=req.mission.buffer)
+    rows, candidates = airspace.query_pairs(primary_ovbs, exclude_ids=["Primary"])
+    return (OVBBatch.from_ovbs(primary_ovbs), OVBBatch.from_ovbs(candidates),
+            np.asarray(rows, dtype=np.int64), np.arange(len(candidates)))
+
+
+def cached_pairs(req: AnalyzeRequest) -> CandidatePairs:
+    """Inline traffic through the result cache: only changed drones are re-checked."""
+    traffic = [
+        (drone_id, waypoints_to_array(wps)) for drone_id, wps in req.simulated_drones.items()
+        if drone_id != "Primary"
+    ]
+    return app.state.results.conflicting_pairs(
+        "Primary", waypoints_to_array(req.mission.waypoints), req.mission.buffer, traffic, req.mission.buffer
+    )
+
+
+def columnar_pairs(req: ColumnarRequest) -> CandidatePairs:
+    """Binary path: traffic arrays go straight to the vectorized OVB builder."""
+    primary, traffic = req.primary_batch(), req.traffic_batch()
+    rows, cols = sweep_pairs(bounds_array(primary).reshape(-1, 8), bounds_array(traffic).reshape(-1, 8))
+    p_codes, t_codes = drone_codes(primary, traffic)
+    keep = p_codes[primary.drone_index[rows]] != t_codes[traffic.drone_index[cols]]
+    return primary, traffic, rows[keep], cols[keep]
+
+
+def iter_analysis(pairs: CandidatePairs, early_exit: bool = False, detector: str = "box",
+                  episodes: bool = False) -> Iterator[dict]:
+    """
+    Conflict dicts as each primary OVB is processed, then one summary dict.
+    With early_exit the scan stops after the first OVB that has a conflict.
+    With episodes the conflicts are held back and merged per drone instead,
+    so the episode dicts all come out after the scan.
+    """
+    primary, others, rows, cols = pairs
+    count, checked, stopped = 0, 0, False
+    held: List[Conflict] = []
+    for _, found in iter_conflicts_by_row(primary, others, rows, cols, detector):
+        checked += 1
+        count += len(found)
+        if episodes:
+            held.extend(found)
+        else:
+            yield from conflict_dicts(found)
+        if early_exit and found:
+            stopped = checked < len(primary)
+            break
+    summary = {
+        "status": "conflict detected" if count else "clear",
+        "conflict_count": count,
+        "ovbs_checked": checked,
+        "ovbs_total": len(primary),
+        "early_exit": stopped
+    }
+    if episodes:
+        merged = merge_episodes(held, EPISODE_GAP)
+        summary["episode_count"] = len(merged)
+        yield from episode_dicts(merged)
+    yield {"summary": summary}
+
+
+def respond(pairs: CandidatePairs, stream: bool, early_exit: bool, detector: str = "box", raw: bool = False):
+    # Streams report raw conflicts as they are found; whole responses merge them
+    if stream:
+        lines = (json.dumps(item) + "\n" for item in iter_analysis(pairs, early_exit, detector))
+        return StreamingResponse(lines, media_type=NDJSON_MEDIA_TYPE)
+    items = list(iter_analysis(pairs, early_exit, detector, episodes=not raw))
+    return {"status": items[-1]["summary"]["status"], "conflicts": items[:-1]}
+
+
+def _analyze_body_schema() -> dict:
+    schema = AnalyzeRequest.schema(ref_template="#/components/schemas/{model}")
+    schema.pop("$defs", None)
+    schema.pop("definitions", None)
+    return schema
+
+
+@app.post("/analyze", openapi_extra={"requestBody": {"required": True, "content": {
+    "application/json": {"schema": _analyze_body_schema()},
+    NPZ_MEDIA_TYPE: {"schema": {"type": "string", "format": "binary"}}
+}}})
+async def analyze(request: Request, stream: bool = False, early_exit: bool = False,
+                  detector: DetectorName = "box", raw: bool = False):
+    """
+    Content negotiation: a JSON AnalyzeRequest as before, or the columnar .npz
+    format (app/columnar.py). `stream=true` (or Accept: application/x-ndjson)
+    returns NDJSON: one conflict per line, then a {"summary": ...} line.
+    `early_exit=true` stops at the first conflicting primary OVB.
+    `detector=cpa` reports closest-approach conflicts instead of box overlaps.
+    Conflicts are merged into per-drone episodes unless `raw=true` (streams
+    are always raw).
+    """
+    stream = stream or NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    body = await request.body()
+    if content_type == NPZ_MEDIA_TYPE:
+        try:
+            creq = decode_analyze_request(body)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return await run_in_threadpool(analyze_columnar, creq, stream, early_exit, detector, raw)
+
+    try:
+        req = AnalyzeRequest.parse_raw(body)
+    except ValidationError as e:
+        raise RequestValidationError(e.errors())
+    if req.workers > 1 and (stream or early_exit or detector != "box"):
+        # Sharded detection returns whole box-detector results only
+        raise RequestValidationError([{
+            "loc": ("workers",),
+            "msg": "workers > 1 cannot be combined with stream, early_exit or detector=cpa",
+            "type": "value_error"
+        }])
+    return await run_in_threadpool(analyze_json, req, stream, early_exit, detector, raw)
+
+
+def analyze_columnar(req: ColumnarRequest, stream: bool = False, early_exit: bool = False,
+                     detector: str = "box", raw: bool = False):
+    try:
+        return respond(columnar_pairs(req), stream, early_exit, detector, raw)
+
+    except Exception as e:
+        print("⚠️ Exception in /analyze:", str(e))
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+def analyze_json(req: AnalyzeRequest, stream: bool = False, early_exit: bool = False,
+                 detector: str = "box", raw: bool = False):
+    try:
+        # The sharded detector and the result cache hold box-detector results
+        if detector == "box":
+            if req.workers > 1:
+                airspace = traffic_airspace(req.simulated_drones, req.mission.buffer, req.broad_phase)
+                return analyze_mission(req.mission, airspace, workers=req.workers, raw=raw)
+            # The cache checks every uncached drone up front, so early_exit
+            # takes the lazy per-OVB path below to actually save work
+            if req.simulated_drones is not None and req.use_cache and not early_exit:
+                return respond(cached_pairs(req), stream, early_exit, raw=raw)
 
         # Run conflict detection
-        conflicts = []
-        for ovb in primary_ovbs:
-            for cid in spatial_query(ovb, rtree_index):
-                ob = id_map[cid]
-                if abs(ovb.center[2] - ob.center[2]) > 40:
-                    continue
-                if abs(ovb.entry_time - ob.exit_time) > 30:
-                    continue
-                for c in detect_conflicts([ovb], [ob]):
-                    conflicts.append({
-                        "with_": ob.drone_id,
-                        "location": list(c.location),
-                        "time": c.entry_time,
-                        "actual_gap": c.actual_gap,
-                        "required_gap": c.required_gap
-                    })
+        return respond(airspace_pairs(req), stream, early_exit, detector, raw)
+
+    except Exception as e:
+        print("⚠️ Exception in /analyze:", str(e))
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+def run_analyze_job(req: AnalyzeRequest, job: Job) -> dict:
+    job.report(0, 1, "indexing")
+    primary, others, rows, cols = airspace_pairs(req)
+    conflicts = []
+    for row, found in iter_conflicts_by_row(primary, others, rows, cols):
+        conflicts.extend(found)
+        job.report(row + 1, len(primary), "detection")
+    return {
+        "status": "conflict detected" if conflicts else "clear",
+        "conflicts": episode_dicts(merge_episodes(conflicts, EPISODE_GAP))
+    }
+
+
+def run_fleet_job(req: FleetJobRequest, job: Job) -> dict:
+    agents = []
+    for drone_id, wps in req.missions.items():
+        job.report(len(agents), len(req.missions), "trajectories")
+        mission = Mission(id=drone_id, waypoints=to_waypoints(wps), priority=req.priorities.get(drone_id, 1))
+        agents.append(DroneAgent(mission))
+    job.report(0, 1, "detection")
+    found = app.state.fleet.check_all(agents, workers=FLEET_WORKERS)
+    result = {
+        "conflicts": {aid: len(c) for aid, c in found.items()},
+        "conflict_count": sum(len(c) for c in found.values())
+    }
+    if not req.resolve:
+        return result
+
+    def progress(iteration, done, total):
+        job.report(done, total, f"resolution pass {iteration}")
+
+    schedule = ResolutionScheduler(agents, max_iterations=req.max_iterations, max_delay=req.max_delay).run(progress)
+    result.update({
+        "converged": schedule.converged,
+        "iterations": schedule.iterations,
+        "delays": schedule.delays,
+        "unresolved": schedule.unresolved,
+        "remaining_conflicts": {a.mission.id: len(a.conflicts) for a in agents}
+    })
+    return result
+
+
+@app.get("/cache")
+def cache_stats():
+    return app.state.results.stats()
+
+
+@app.delete("/cache")
+def clear_cache():
+    app.state.results.clear()
+    return app.state.results.stats()
+
+
+@app.post("/jobs", status_code=202)
+def submit_job(req: JobRequest):
+    payload = getattr(req, req.kind)
+    if payload is None:
+        raise HTTPException(status_code=422, detail=f"Job kind '{req.kind}' needs a '{req.kind}' body")
+    runner = run_analyze_job if req.kind == "analyze" else run_fleet_job
+    try:
+        job = app.state.jobs.submit(req.kind, lambda job: runner(payload, job))
+    except QueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    return job.to_dict(with_result=False)
+
+
+@app.get("/jobs")
+def list_jobs():
+    return {"jobs": [job.to_dict(with_result=False) for job in app.state.jobs.list()]}
+
+
+@app.get("/jobs/{job_id}")
+def get_job(job_id: str):
+    job = app.state.jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job '{job_id}' not found")
+    return job.to_dict()
+
+
+@app.delete("/jobs/{job_id}")
+def cancel_job(job_id: str):
+    job = app.state.jobs.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job '{job_id}' not found")
+    return job.to_dict(with_result=False)
+
+
+@app.post("/analyze_batch")
+def analyze_batch(req: AnalyzeBatchRequest):
+    try:
+        airspace = traffic_airspace(req.simulated_drones, req.buffer, req.broad_phase)
+
+        def evaluate(indexed):
+            i, mission = indexed
+            result = analyze_mission(mission, airspace, primary_id=f"Candidate_{i}")
+            severities = [c["severity"] for c in result["conflicts"]]
+            result.update({
+                "candidate": i,
+                "conflict_count": sum(c["conflict_count"] for c in result["conflicts"]),
+                "episode_count": len(severities),
+                "total_severity": float(sum(severities)),
+                "max_severity": max(severities, default=0.0)
+            })
+            return result
+
+        jobs = list(enumerate(req.candidates))
+        if req.workers > 1:
+            with ThreadPoolExecutor(max_workers=req.workers) as pool:
+                results = list(pool.map(evaluate, jobs))
+        else:
+            results = [evaluate(job) for job in jobs]
 
         return {
-            "status": "conflict detected" if conflicts else "clear",
-            "conflicts": conflicts
+            "clear": [r["candidate"] for r in results if not r["conflicts"]],
+            "results": results
         }
 
     except Exception as e:
-        print("⚠️ Exception in /analyze:", str(e))
+        print("⚠️ Exception in /analyze_batch:", str(e))
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+def traffic_batch(simulated_drones: Optional[Dict[str, List[WaypointIn]]], buffer: float,
+                  exclude_id: str = "Primary") -> OVBBatch:
+    """Inline traffic built in one vectorized pass, or the registered airspace's boxes."""
+    if simulated_drones is None:
+        snapshot = app.state.airspace.snapshot()
+        if exclude_id not in snapshot.drone_ids:
+            return snapshot
+        return snapshot.take(snapshot.drone_index != snapshot.drone_ids.index(exclude_id))
+    ids = [d for d in simulated_drones if d != exclude_id]
+    rows = [waypoints_to_array(simulated_drones[d]) for d in ids]
+    if not rows:
+        return OVBBatch.empty()
+    drone_index = np.repeat(np.arange(len(ids)), [len(r) for r in rows])
+    return generate_ovbs_batch(np.concatenate(rows), ids, drone_index, width=buffer)
+
+
+@app.post("/what_if")
+def what_if(req: WhatIfRequest):
+    """
+    Re-checks the mission shifted by every (delay, altitude offset) of the
+    grid against the traffic and returns the cheapest conflict-free shift.
+    """
+    try:
+        primary = generate_ovbs_batch(waypoints_to_array(req.mission.waypoints), "Primary", width=req.mission.buffer)
+        result = sweep_offsets(
+            primary, traffic_batch(req.simulated_drones, req.mission.buffer),
+            req.delays, req.altitude_offsets, req.delay_weight, req.altitude_weight
+        )
+        return {
+            "status": "resolved" if result.best else "no conflict-free variant",
+            "best": asdict(result.best) if result.best else None,
+            "variants": [asdict(v) for v in result.variants]
+        }
+
+    except Exception as e:
+        print("⚠️ Exception in /what_if:", str(e))
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,87 @@
+# app/columnar.py
+#
+# Binary columnar request format for /analyze (Content-Type: application/x-npz).
+# A NumPy .npz archive with
+#   mission  (m, 4) float64   primary waypoints, x y z t
+#   traffic  (n, 4) float64   every traffic waypoint, drones stacked
+#   offsets  (d + 1,) int64   rows of drone k are traffic[offsets[k]:offsets[k + 1]]
+#   ids      (d,) str         optional drone ids (default SimDrone_<k>)
+#   buffer   () float64       optional OVB width (default 20)
+# Arrays go straight into generate_ovbs_batch; no per-waypoint objects are built.
+
+from dataclasses import dataclass
+from typing import Dict, List, Mapping
+import io
+import numpy as np
+from app.models import OVBBatch
+from app.trajectory_model import generate_ovbs_batch
+
+MEDIA_TYPE = "application/x-npz"
+
+
+@dataclass
+class ColumnarRequest:
+    mission: np.ndarray
+    traffic: np.ndarray
+    offsets: np.ndarray
+    ids: List[str]
+    buffer: float = 20.0
+
+    def primary_batch(self, primary_id: str = "Primary") -> OVBBatch:
+        return generate_ovbs_batch(self.mission, primary_id, width=self.buffer)
+
+    def traffic_batch(self) -> OVBBatch:
+        """Every traffic drone's OVBs in one vectorized pass."""
+        drone_index = np.repeat(np.arange(len(self.ids)), np.diff(self.offsets))
+        return generate_ovbs_batch(self.traffic, self.ids, drone_index, width=self.buffer)
+
+
+def encode_analyze_request(mission, traffic: Mapping[str, np.ndarray], buffer: float = 20.0) -> bytes:
+    """Client side: primary waypoints and {drone id: (k, 4) waypoints} as .npz bytes."""
+    ids = list(traffic)
+    rows = [np.asarray(traffic[d], dtype=np.float64).reshape(-1, 4) for d in ids]
+    out = io.BytesIO()
+    np.savez(
+        out,
+        mission=np.asarray(mission, dtype=np.float64).reshape(-1, 4),
+        traffic=np.concatenate(rows) if rows else np.empty((0, 4)),
+        offsets=np.concatenate([[0], np.cumsum([len(r) for r in rows])]).astype(np.int64),
+        ids=np.array(ids, dtype=str),
+        buffer=np.float64(buffer)
+    )
+    return out.getvalue()
+
+
+def decode_analyze_request(body: bytes) -> ColumnarRequest:
+    """Parses an .npz body; raises ValueError on a malformed payload."""
+    try:
+        # allow_pickle=False: only plain numeric / string arrays are accepted
+        with np.load(io.BytesIO(body), allow_pickle=False) as archive:
+            arrays: Dict[str, np.ndarray] = {name: archive[name] for name in archive.files}
+    except Exception as e:
+        raise ValueError(f"Invalid {MEDIA_TYPE} body: {e}") from None
+
+    for name in ("mission", "traffic", "offsets"):
+        if name not in arrays:
+            raise ValueError(f"Missing array '{name}'")
+    mission = arrays["mission"].astype(np.float64)
+    traffic = arrays["traffic"].astype(np.float64)
+    offsets = arrays["offsets"].astype(np.int64).ravel()
+    if mission.ndim != 2 or mission.shape[1] != 4 or traffic.ndim != 2 or traffic.shape[1] != 4:
+        raise ValueError("'mission' and 'traffic' must have shape (n, 4)")
+    if len(offsets) == 0 or offsets[0] != 0 or offsets[-1] != len(traffic) or np.any(np.diff(offsets) < 0):
+        raise ValueError("'offsets' must rise from 0 to len(traffic)")
+
+    count = len(offsets) - 1
+    if "ids" in arrays and arrays["ids"].ndim != 1:
+        raise ValueError("'ids' must be a 1-D array")
+    ids = [str(d) for d in arrays["ids"].tolist()] if "ids" in arrays else [f"SimDrone_{k}" for k in range(count)]
+    if len(ids) != count:
+        raise ValueError(f"{len(ids)} ids for {count} drones")
+    if "buffer" in arrays and arrays["buffer"].shape != ():
+        raise ValueError("'buffer' must be a scalar")
+    try:
+        buffer = float(arrays["buffer"]) if "buffer" in arrays else 20.0
+    except (TypeError, ValueError):
+        raise ValueError("'buffer' must be a number") from None
+    return ColumnarRequest(mission, traffic, offsets, ids, buffer)
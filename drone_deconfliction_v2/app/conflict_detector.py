@@ -1,14 +1,38 @@
 # app/conflict_detector.py
 
-from typing import List
-from .models import OVB, Conflict
+from dataclasses import replace
+from typing import Iterator, List, NamedTuple, Sequence, Tuple
+import numpy as np
+from .models import OVB, OVBBatch, Conflict, ConflictEpisode
+
+# Conflicts with the same drone at most this many seconds apart form one episode
+EPISODE_GAP = 5.0
+
+def oriented_overlap_2d(dx, dy, heading_a, length_a, width_a, heading_b, length_b, width_b):
+    """
+    Separating-axis test for two footprints, each `length` along its heading
+    and `width` across it; (dx, dy) is the offset between their centers.
+    Works element-wise on NumPy arrays as well as on scalars.
+    """
+    cos_a, sin_a = np.cos(heading_a), np.sin(heading_a)
+    cos_b, sin_b = np.cos(heading_b), np.sin(heading_b)
+    # |cos| / |sin| of the relative heading
+    c = np.abs(cos_a * cos_b + sin_a * sin_b)
+    s = np.abs(sin_a * cos_b - cos_a * sin_b)
+    hla, hwa, hlb, hwb = length_a / 2, width_a / 2, length_b / 2, width_b / 2
+    return (
+        (np.abs(dx * cos_a + dy * sin_a) <= hla + hlb * c + hwb * s)
+        & (np.abs(-dx * sin_a + dy * cos_a) <= hwa + hlb * s + hwb * c)
+        & (np.abs(dx * cos_b + dy * sin_b) <= hlb + hla * c + hwa * s)
+        & (np.abs(-dx * sin_b + dy * cos_b) <= hwb + hla * s + hwa * c)
+    )
 
 def boxes_overlap_2d(a: OVB, b: OVB) -> bool:
-    ax, ay = a.center[0], a.center[1]
-    bx, by = b.center[0], b.center[1]
-    half_w = (a.width + b.width) / 2
-    half_l = (a.length + b.length) / 2
-    return abs(ax - bx) <= half_w and abs(ay - by) <= half_l
+    return bool(oriented_overlap_2d(
+        b.center[0] - a.center[0], b.center[1] - a.center[1],
+        a.heading, a.length, a.width,
+        b.heading, b.length, b.width
+    ))
 
 def boxes_overlap_altitude(a: OVB, b: OVB) -> bool:
     az = a.center[2]
@@ -27,34 +51,282 @@ def actual_time_gap(a: OVB, b: OVB) -> float:
 def required_time_gap(a: OVB, b: OVB) -> float:
     return (2 * b.length) / max(0.1, b.length / (b.exit_time - b.entry_time))  # Avoid zero division
 
+
+class PairConflicts(NamedTuple):
+    """Candidate pairs (rows of batch a / batch b) that are real conflicts."""
+    ia: np.ndarray
+    ib: np.ndarray
+    actual_gap: np.ndarray
+    required_gap: np.ndarray
+    severity: np.ndarray
+
+
+def pairs_overlap(a: OVBBatch, b: OVBBatch, ia: np.ndarray, ib: np.ndarray) -> np.ndarray:
+    """Mask of candidate pairs whose oriented boxes overlap in x/y, z and time."""
+    ca, cb = a.centers[ia], b.centers[ib]
+    return (
+        oriented_overlap_2d(
+            cb[:, 0] - ca[:, 0], cb[:, 1] - ca[:, 1],
+            a.heading[ia], a.length[ia], a.width[ia],
+            b.heading[ib], b.length[ib], b.width[ib]
+        )
+        & (np.abs(ca[:, 2] - cb[:, 2]) <= (a.height[ia] + b.height[ib]) / 2)
+        & (a.exit_time[ia] >= b.entry_time[ib])
+        & (b.exit_time[ib] >= a.entry_time[ia])
+    )
+
+
+def gap_conflicts(a: OVBBatch, b: OVBBatch, ia: np.ndarray, ib: np.ndarray) -> PairConflicts:
+    """Gap test, seen from a, for pairs already known to overlap."""
+    t_a = (a.entry_time[ia] + a.exit_time[ia]) / 2
+    t_b = (b.entry_time[ib] + b.exit_time[ib]) / 2
+    dt_actual = np.abs(t_a - t_b)
+    dt_required = 2 * b.length[ib] / b.speed[ib]
+
+    hit = dt_actual < dt_required
+    dt_actual, dt_required = dt_actual[hit], dt_required[hit]
+    return PairConflicts(
+        ia=ia[hit],
+        ib=ib[hit],
+        actual_gap=dt_actual,
+        required_gap=dt_required,
+        severity=(dt_required - dt_actual) / dt_required
+    )
+
+
+def narrow_phase(a: OVBBatch, b: OVBBatch, ia: np.ndarray, ib: np.ndarray) -> PairConflicts:
+    """
+    Vectorized overlap + gap test for the candidate pairs (a[ia[k]], b[ib[k]])
+    produced by the broad phase. Footprints are oriented by heading; gaps are
+    measured between box midpoint times and the required gap is the time b
+    needs to fly twice its own box length.
+    """
+    ia = np.asarray(ia, dtype=np.int64)
+    ib = np.asarray(ib, dtype=np.int64)
+    overlap = pairs_overlap(a, b, ia, ib)
+    return gap_conflicts(a, b, ia[overlap], ib[overlap])
+
+
+def narrow_phase_both(batch: OVBBatch, ia: np.ndarray, ib: np.ndarray) -> Tuple[PairConflicts, PairConflicts]:
+    """
+    narrow_phase for unordered pairs within one batch: the overlap test runs
+    once, then the gap test from each side (the required gap depends on the
+    other box, so the two directions can differ).
+    """
+    ia = np.asarray(ia, dtype=np.int64)
+    ib = np.asarray(ib, dtype=np.int64)
+    overlap = pairs_overlap(batch, batch, ia, ib)
+    ia, ib = ia[overlap], ib[overlap]
+    return gap_conflicts(batch, batch, ia, ib), gap_conflicts(batch, batch, ib, ia)
+
+
+def closest_approach(a: OVBBatch, b: OVBBatch, ia: np.ndarray,
+                     ib: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Closest approach of every pair (a[ia[k]], b[ib[k]]), each box taken as
+    level flight at constant velocity along its heading from entry to exit.
+    The relative motion is linear, so the time minimizing the horizontal
+    distance is -(r0 . w) / |w|^2, clipped to the common time window.
+    Returns (time, (k, 2) position of a, (k, 2) position of b, distance);
+    pairs without a common window are evaluated at max(entry times).
+    """
+    t0 = np.maximum(a.entry_time[ia], b.entry_time[ib])
+    window = np.maximum(np.minimum(a.exit_time[ia], b.exit_time[ib]) - t0, 0.0)
+
+    def track(batch, rows):
+        heading = np.column_stack([np.cos(batch.heading[rows]), np.sin(batch.heading[rows])])
+        velocity = heading * batch.speed[rows][:, None]
+        start = batch.centers[rows, :2] - heading * (batch.length[rows] / 2)[:, None]
+        return start + velocity * (t0 - batch.entry_time[rows])[:, None], velocity
+
+    pa, va = track(a, ia)
+    pb, vb = track(b, ib)
+    r0, w = pa - pb, va - vb
+    ww = np.einsum("ij,ij->i", w, w)
+    tau = np.divide(-np.einsum("ij,ij->i", r0, w), ww, out=np.zeros_like(ww), where=ww > 0)
+    tau = np.clip(tau, 0.0, window)[:, None]
+    pa, pb = pa + va * tau, pb + vb * tau
+    return t0 + tau[:, 0], pa, pb, np.hypot(*(pa - pb).T)
+
+
+def cpa_phase(a: OVBBatch, b: OVBBatch, ia: np.ndarray, ib: np.ndarray) -> PairConflicts:
+    """
+    Continuous alternative to narrow_phase: a pair conflicts when the boxes
+    share a time window, their altitudes are within the summed half
+    heights, and the closest approach is under the summed half widths
+    (the lateral buffers). Gaps are in seconds of b's flight: actual = miss
+    distance / b's speed, required = separation / b's speed.
+    """
+    ia = np.asarray(ia, dtype=np.int64)
+    ib = np.asarray(ib, dtype=np.int64)
+    _, _, _, dist = closest_approach(a, b, ia, ib)
+    separation = (a.width[ia] + b.width[ib]) / 2
+    hit = (
+        (dist < separation)
+        & (np.abs(a.centers[ia, 2] - b.centers[ib, 2]) <= (a.height[ia] + b.height[ib]) / 2)
+        & (a.exit_time[ia] >= b.entry_time[ib])
+        & (b.exit_time[ib] >= a.entry_time[ia])
+    )
+    speed = np.maximum(b.speed[ib][hit], 0.1)
+    dist, separation = dist[hit], separation[hit]
+    return PairConflicts(
+        ia=ia[hit],
+        ib=ib[hit],
+        actual_gap=dist / speed,
+        required_gap=separation / speed,
+        severity=(separation - dist) / separation
+    )
+
+
+def build_cpa_conflicts(a: OVBBatch, b: OVBBatch, pairs: PairConflicts) -> List[Conflict]:
+    """Conflict objects located at the closest approach of each cpa_phase pair."""
+    ia, ib = pairs.ia, pairs.ib
+    t, pa, pb, _ = closest_approach(a, b, ia, ib)
+    z = (a.centers[ia, 2] + b.centers[ib, 2]) / 2
+    locations = np.column_stack([(pa + pb) / 2, z]).tolist()
+    times = t.tolist()
+    with_ids = [b.drone_ids[d] for d in b.drone_index[ib].tolist()]
+    actual = pairs.actual_gap.tolist()
+    required = pairs.required_gap.tolist()
+    severity = pairs.severity.tolist()
+    return [
+        Conflict(
+            location=tuple(locations[k]),
+            time_a=times[k],
+            time_b=times[k],
+            time=times[k],
+            actual_gap=actual[k],
+            required_gap=required[k],
+            with_id=with_ids[k],
+            severity=severity[k]
+        )
+        for k in range(len(ia))
+    ]
+
+
+def build_conflicts(a: OVBBatch, b: OVBBatch, pairs: PairConflicts) -> List[Conflict]:
+    """Materializes Conflict objects for the pairs that survived narrow_phase."""
+    ia, ib = pairs.ia, pairs.ib
+    t_a = ((a.entry_time[ia] + a.exit_time[ia]) / 2).tolist()
+    t_b = ((b.entry_time[ib] + b.exit_time[ib]) / 2).tolist()
+    locations = ((a.centers[ia] + b.centers[ib]) / 2).tolist()
+    with_ids = [b.drone_ids[d] for d in b.drone_index[ib].tolist()]
+    actual = pairs.actual_gap.tolist()
+    required = pairs.required_gap.tolist()
+    severity = pairs.severity.tolist()
+    return [
+        Conflict(
+            location=tuple(locations[k]),
+            time_a=t_a[k],
+            time_b=t_b[k],
+            time=(t_a[k] + t_b[k]) / 2,               # midpoint time
+            actual_gap=actual[k],
+            required_gap=required[k],
+            with_id=with_ids[k],
+            severity=severity[k]
+        )
+        for k in range(len(ia))
+    ]
+
+
+# Narrow phase by name: (pair filter, Conflict builder)
+DETECTORS = {
+    "box": (narrow_phase, build_conflicts),
+    "cpa": (cpa_phase, build_cpa_conflicts),
+}
+
+
+def conflicts_from_pairs(a: OVBBatch, b: OVBBatch, ia: np.ndarray, ib: np.ndarray,
+                         detector: str = "box") -> List[Conflict]:
+    """Narrow phase + Conflict objects; `detector` is "box" (overlap + gap) or "cpa"."""
+    try:
+        check, build = DETECTORS[detector]
+    except KeyError:
+        raise ValueError(f"Unknown conflict detector: {detector}") from None
+    return build(a, b, check(a, b, ia, ib))
+
+
+def iter_conflicts_by_row(a: OVBBatch, b: OVBBatch, ia: np.ndarray, ib: np.ndarray,
+                          detector: str = "box") -> Iterator[Tuple[int, List[Conflict]]]:
+    """
+    (row of a, its conflicts) for every row of a in order, narrow-phasing one
+    row's candidate pairs at a time so callers can stream or stop early.
+    """
+    ia = np.asarray(ia, dtype=np.int64)
+    ib = np.asarray(ib, dtype=np.int64)
+    order = np.lexsort((ib, ia))
+    ia, ib = ia[order], ib[order]
+    bounds = np.searchsorted(ia, np.arange(len(a) + 1))
+    for row in range(len(a)):
+        lo, hi = bounds[row], bounds[row + 1]
+        yield row, conflicts_from_pairs(a, b, ia[lo:hi], ib[lo:hi], detector) if hi > lo else []
+
+
+def merge_episodes(conflicts: Sequence[Conflict], max_gap: float = EPISODE_GAP) -> List[ConflictEpisode]:
+    """
+    Collapses each drone's conflicts into episodes. A conflict spans
+    [min(time_a, time_b), max(time_a, time_b)]; sorted by start, it joins the
+    current episode of its drone when it starts at most `max_gap` seconds
+    after that episode's end. Episodes come out grouped by drone (in order of
+    first appearance), then by start time.
+    """
+    if not conflicts:
+        return []
+    lookup = {}
+    code = np.array([lookup.setdefault(c.with_id, len(lookup)) for c in conflicts], dtype=np.int64)
+    t_a = np.array([c.time_a for c in conflicts], dtype=np.float64)
+    t_b = np.array([c.time_b for c in conflicts], dtype=np.float64)
+    start, end = np.minimum(t_a, t_b), np.maximum(t_a, t_b)
+
+    # Lay the drones out on one time axis, each after the previous one's
+    # span + max_gap, so a single running max of end times spans all groups
+    origin = start.min()
+    shift = code * (end.max() - origin + max_gap + 1.0)
+    order = np.lexsort((start, code))
+    lo, hi = (start - origin + shift)[order], (end - origin + shift)[order]
+    reach = np.maximum.accumulate(hi)
+    first = np.flatnonzero(np.concatenate([[True], lo[1:] > reach[:-1] + max_gap]))
+
+    severity = np.array([c.severity for c in conflicts], dtype=np.float64)[order]
+    required = np.array([c.required_gap for c in conflicts], dtype=np.float64)[order]
+    actual = np.array([c.actual_gap for c in conflicts], dtype=np.float64)[order]
+    counts = np.diff(np.append(first, len(order)))
+    episode = np.repeat(np.arange(len(first)), counts)
+    worst = order[np.lexsort((-severity, episode))[first]]   # most severe member of each episode
+    ep_start = start[order][first]
+    ep_end = np.maximum.reduceat(end[order], first)
+    max_severity = np.maximum.reduceat(severity, first)
+    max_required = np.maximum.reduceat(required, first)
+    max_deficit = np.maximum.reduceat(required - actual, first)
+    return [
+        ConflictEpisode(
+            with_id=conflicts[w].with_id,
+            start_time=float(ep_start[k]),
+            end_time=float(ep_end[k]),
+            location=conflicts[w].location,
+            time=conflicts[w].time,
+            actual_gap=float(max_required[k] - max_deficit[k]),
+            required_gap=float(max_required[k]),
+            severity=float(max_severity[k]),
+            conflict_count=int(counts[k])
+        )
+        for k, w in enumerate(worst.tolist())
+    ]
+
+
+def all_pairs(n_a: int, n_b: int):
+    """Every (i, j) row pair, a-major, i.e. the order of a nested loop."""
+    return np.repeat(np.arange(n_a), n_b), np.tile(np.arange(n_b), n_a)
+
+
 def detect_conflicts_between_ovbs(
     drone_a: str,
     drone_b: str,
     ovbs_a: List[OVB],
     ovbs_b: List[OVB]
 ) -> List[Conflict]:
-    conflicts = []
-
-    for box_a in ovbs_a:
-        for box_b in ovbs_b:
-            if boxes_overlap_2d(box_a, box_b) and \
-               boxes_overlap_altitude(box_a, box_b) and \
-               boxes_overlap_time(box_a, box_b):
-                
-                dt_actual = actual_time_gap(box_a, box_b)
-                dt_required = required_time_gap(box_a, box_b)
-
-                if dt_actual < dt_required:
-                    severity = (dt_required - dt_actual) / dt_required
-                    conflict = Conflict(
-                        drone_a=drone_a,
-                        drone_b=drone_b,
-                        location=box_a.center,
-                        time=(box_a.entry_time + box_a.exit_time) / 2,
-                        actual_gap=dt_actual,
-                        required_gap=dt_required,
-                        severity=severity
-                    )
-                    conflicts.append(conflict)
-    
-    return conflicts
+    batch_a = OVBBatch.from_ovbs(ovbs_a)
+    batch_b = OVBBatch.from_ovbs(ovbs_b)
+    ia, ib = all_pairs(len(batch_a), len(batch_b))
+    conflicts = conflicts_from_pairs(batch_a, batch_b, ia, ib)
+    return [replace(conflict, with_id=drone_b) for conflict in conflicts]
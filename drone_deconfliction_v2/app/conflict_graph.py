@@ -0,0 +1,118 @@
+# app/conflict_graph.py
+
+from concurrent.futures import Executor
+from contextlib import nullcontext
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Set, Union
+import time
+from .agent import DroneAgent
+from .models import Conflict, Mission
+from .optimizer import resolve_fleet
+from .sharded_detector import process_pool
+
+
+@dataclass
+class ComponentResult:
+    members: List[str]
+    delays: Optional[Dict[str, float]]   # None if the component is infeasible
+    conflicts: int
+    elapsed: float                       # solve time in seconds
+
+    @property
+    def feasible(self) -> bool:
+        return self.delays is not None
+
+
+def solve_component(missions: List[Mission], conflicts: Dict[str, List[Conflict]],
+                    max_delay: Union[float, Dict[str, float]] = 120.0,
+                    optimal_order: bool = False):
+    """Process-pool entry point: (delays, solve seconds) for one component."""
+    start = time.perf_counter()
+    delays = resolve_fleet(missions, conflicts, max_delay, optimal_order)
+    return delays, time.perf_counter() - start
+
+
+class ConflictGraph:
+    """
+    Undirected graph of agents linked by their `Conflict.with_id` references.
+    Connected components share no conflicts, so their delay problems are
+    independent and can be solved in parallel.
+    """
+
+    def __init__(self, agents: Iterable[DroneAgent]):
+        self.agents: Dict[str, DroneAgent] = {a.mission.id: a for a in agents}
+        self.adjacency: Dict[str, Set[str]] = {aid: set() for aid in self.agents}
+        for aid, agent in self.agents.items():
+            for c in agent.conflicts:
+                if c.with_id in self.agents and c.with_id != aid:
+                    self.adjacency[aid].add(c.with_id)
+                    self.adjacency[c.with_id].add(aid)
+
+    def components(self) -> List[List[str]]:
+        """Connected components, largest first."""
+        seen: Set[str] = set()
+        found = []
+        for root in self.agents:
+            if root in seen:
+                continue
+            seen.add(root)
+            stack, members = [root], []
+            while stack:
+                node = stack.pop()
+                members.append(node)
+                for nxt in self.adjacency[node]:
+                    if nxt not in seen:
+                        seen.add(nxt)
+                        stack.append(nxt)
+            found.append(members)
+        found.sort(key=len, reverse=True)
+        return found
+
+    def resolve(self, workers: Optional[int] = None,
+                max_delay: Union[float, Dict[str, float]] = 120.0,
+                optimal_order: bool = False, apply: bool = True,
+                pool: Optional[Executor] = None) -> List[ComponentResult]:
+        """
+        Solves each component's delay problem (on a process pool when
+        workers > 1) and writes `delay` / `resolved` back to the agents;
+        with `apply` the delays are also flown into their waypoints and OVBs.
+        Callers that resolve repeatedly should pass a long-lived `pool`;
+        otherwise one is started and stopped for this call.
+        """
+        jobs = []
+        for members in self.components():
+            missions = [self.agents[m].mission for m in members]
+            conflicts = {m: self.agents[m].conflicts for m in members}
+            jobs.append((members, missions, conflicts))
+
+        results = []
+        if pool is not None or (workers and workers > 1):
+            # Singletons are closed-form; only clusters are worth shipping to a worker
+            with nullcontext(pool) if pool is not None else process_pool(workers) as executor:
+                solved = [
+                    executor.submit(solve_component, missions, conflicts, max_delay, optimal_order)
+                    if len(members) > 1 else
+                    solve_component(missions, conflicts, max_delay, optimal_order)
+                    for members, missions, conflicts in jobs
+                ]
+                solved = [s if isinstance(s, tuple) else s.result() for s in solved]
+        else:
+            solved = [
+                solve_component(missions, conflicts, max_delay, optimal_order)
+                for _, missions, conflicts in jobs
+            ]
+
+        for (members, _, conflicts), (delays, elapsed) in zip(jobs, solved):
+            results.append(ComponentResult(
+                members=members,
+                delays=delays,
+                conflicts=sum(len(c) for c in conflicts.values()),
+                elapsed=elapsed
+            ))
+            for m in members:
+                agent = self.agents[m]
+                agent.resolved = delays is not None
+                agent.delay = delays[m] if delays is not None else -1.0
+                if apply and agent.resolved and agent.delay > 0:
+                    agent.apply_delay(agent.delay)
+        return results
@@ -0,0 +1,165 @@
+# app/fleet_detector.py
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+import threading
+import numpy as np
+from .agent import DroneAgent
+from .conflict_detector import PairConflicts, build_conflicts, conflicts_from_pairs, narrow_phase_both
+from .models import Conflict, OVBBatch
+from .sharded_detector import (
+    SharedArray, _concat_pairs, _pack, _sort_unique, _unpack,
+    attach_arrays, process_pool, release_arrays, share_arrays
+)
+from .utils.broad_phase import bounds_array, sweep_pairs
+
+
+def _check_rows(block: np.ndarray, start: int, stop: int, z_buffer: float,
+                t_buffer: float) -> Tuple[PairConflicts, PairConflicts]:
+    """
+    Both directions of every conflicting unordered pair whose lower row is
+    in start..stop-1 (rows in fleet order, drone_index is the agent code).
+    """
+    fleet = _unpack(block)
+    # Partners of a pair's lower row can only sit at or after `start`
+    rows, cols = sweep_pairs(
+        bounds_array(fleet.take(slice(start, stop)), z_buffer, t_buffer),
+        bounds_array(fleet.take(slice(start, None)))
+    )
+    rows += start
+    cols += start
+    # Each unordered pair once, from its lower row; never an agent against itself
+    keep = (cols > rows) & (fleet.drone_index[rows] != fleet.drone_index[cols])
+    return narrow_phase_both(fleet, rows[keep], cols[keep])
+
+
+def _check_shared(spec: SharedArray, start: int, stop: int, z_buffer: float,
+                  t_buffer: float) -> Tuple[PairConflicts, PairConflicts]:
+    """Process-pool entry point over the shared fleet block."""
+    blocks, (block,) = attach_arrays([spec])
+    try:
+        found = _check_rows(block, start, stop, z_buffer, t_buffer)
+        return tuple(PairConflicts(*(np.array(col) for col in pairs)) for pairs in found)
+    finally:
+        release_arrays(blocks, unlink=False)
+
+
+class FleetDetector:
+    """
+    All-pairs conflict check for a whole fleet in one pass.
+
+    Every agent's boxes go into one batch; each unordered box pair is
+    broad-phased and overlap-tested once, the gap test is run from both
+    sides, and the conflicts are fanned out to the agents. With workers > 1
+    the rows are split into agent-aligned chunks and checked on a process
+    pool over a shared-memory copy of the batch. The pool is kept between
+    calls, like ShardedDetector's; close() (or a with block) stops it.
+    """
+
+    def __init__(self, z_buffer: float = 0.0, t_buffer: float = 0.0, chunks_per_worker: int = 4):
+        self.z_buffer = z_buffer
+        self.t_buffer = t_buffer
+        self.chunks_per_worker = chunks_per_worker
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_workers = 0
+        self._lock = threading.Lock()  # job threads may share one detector
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        with self._lock:
+            self._shutdown()
+
+    def _shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+            self._pool_workers = 0
+
+    def pool(self, workers: int) -> ProcessPoolExecutor:
+        """The long-lived process pool, restarted only when `workers` changes."""
+        with self._lock:
+            if self._pool is None or self._pool_workers != workers:
+                self._shutdown()
+                self._pool = process_pool(workers)
+                self._pool_workers = workers
+            return self._pool
+
+    def _chunks(self, offsets: np.ndarray, parts: int) -> List[Tuple[int, int]]:
+        """Row ranges cut at agent boundaries, of roughly equal box counts."""
+        total = int(offsets[-1])
+        if parts <= 1 or total == 0:
+            return [(0, total)]
+        cuts = offsets[np.searchsorted(offsets, total * np.arange(1, parts) / parts)]
+        bounds = np.unique(np.concatenate([[0], cuts, [total]]))
+        return list(zip(bounds[:-1].tolist(), bounds[1:].tolist()))
+
+    def conflicting_pairs(self, fleet: OVBBatch, offsets: np.ndarray,
+                          workers: int = 1) -> PairConflicts:
+        """Conflicts of every box of `fleet` (rows ia) against other agents' boxes (rows ib)."""
+        block = _pack(fleet, np.arange(len(fleet.drone_ids), dtype=np.int64))
+        chunks = self._chunks(offsets, workers * self.chunks_per_worker if workers > 1 else 1)
+        if workers > 1 and len(chunks) > 1:
+            blocks, (spec,) = share_arrays([block])
+            try:
+                pool = self.pool(workers)
+                futures = [
+                    pool.submit(_check_shared, spec, start, stop, self.z_buffer, self.t_buffer)
+                    for start, stop in chunks
+                ]
+                found = [f.result() for f in futures]
+            finally:
+                release_arrays(blocks)
+        else:
+            found = [_check_rows(block, start, stop, self.z_buffer, self.t_buffer) for start, stop in chunks]
+        return _sort_unique(_concat_pairs([pairs for both in found for pairs in both]), len(fleet))
+
+    def candidate_pairs(self, fleet: OVBBatch) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        (row, partner row) of every broad-phase candidate between different
+        agents, in both directions, ordered by row then partner.
+        """
+        rows, cols = sweep_pairs(bounds_array(fleet, self.z_buffer, self.t_buffer), bounds_array(fleet))
+        keep = fleet.drone_index[rows] != fleet.drone_index[cols]
+        rows, cols = rows[keep], cols[keep]
+        order = np.lexsort((cols, rows))
+        return rows[order], cols[order]
+
+    def check_all(self, agents: Iterable[DroneAgent], workers: int = 1) -> Dict[str, List[Conflict]]:
+        """
+        Replaces `conflicts` of every unresolved agent with its conflicts
+        against the rest of the fleet (resolved agents still count as
+        traffic, as in check_conflict_against); returns them by agent id.
+
+        Each agent's conflicts come from its own `conflict_model`. When every
+        agent uses "box" the symmetric one-pass check above is used; otherwise
+        the candidates of each agent go through that agent's narrow phase,
+        serially.
+        """
+        agents = list(agents)
+        # Agent-contiguous rows; drone codes follow first appearance, i.e. agent order
+        fleet = OVBBatch.from_ovbs([ob for a in agents for ob in a.ovbs])
+        offsets = np.concatenate([[0], np.cumsum([len(a.ovbs) for a in agents])]).astype(np.int64)
+
+        found: Dict[str, List[Conflict]] = {a.mission.id: [] for a in agents}
+        if all(a.conflict_model == "box" for a in agents):
+            pairs = self.conflicting_pairs(fleet, offsets, workers)
+            conflicts = build_conflicts(fleet, fleet, pairs)
+            owners = fleet.drone_index[pairs.ia].tolist()
+            for owner, conflict in zip(owners, conflicts):
+                found[fleet.drone_ids[owner]].append(conflict)
+        else:
+            rows, cols = self.candidate_pairs(fleet)
+            bounds = np.searchsorted(rows, offsets)
+            for agent, start, stop in zip(agents, bounds[:-1], bounds[1:]):
+                found[agent.mission.id] = conflicts_from_pairs(
+                    fleet, fleet, rows[start:stop], cols[start:stop], agent.conflict_model
+                )
+        for agent in agents:
+            if not agent.resolved:
+                agent.conflicts = found[agent.mission.id]
+        return found
@@ -0,0 +1,149 @@
+# app/jobs.py
+
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+import threading
+import time
+import traceback
+import uuid
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+FINISHED = (DONE, FAILED, CANCELLED)
+
+
+class JobCancelled(Exception):
+    """Raised inside a job by Job.report once cancellation was requested."""
+
+
+class QueueFull(Exception):
+    pass
+
+
+@dataclass
+class Job:
+    id: str
+    kind: str
+    status: str = QUEUED
+    progress: float = 0.0
+    stage: str = ""
+    created: float = field(default_factory=time.time)
+    started: Optional[float] = None
+    finished: Optional[float] = None
+    result: Any = None
+    error: Optional[str] = None
+    _cancel: threading.Event = field(default_factory=threading.Event, repr=False)
+    _future: Optional[Future] = field(default=None, repr=False)
+
+    @property
+    def cancel_requested(self) -> bool:
+        return self._cancel.is_set()
+
+    def report(self, done: float, total: float, stage: Optional[str] = None):
+        """Progress hook for the job body; raises JobCancelled when asked to stop."""
+        if self._cancel.is_set():
+            raise JobCancelled()
+        self.progress = min(1.0, done / total) if total else 1.0
+        if stage is not None:
+            self.stage = stage
+
+    def to_dict(self, with_result: bool = True) -> dict:
+        out = {
+            "id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "progress": self.progress,
+            "stage": self.stage,
+            "cancel_requested": self.cancel_requested,
+            "created": self.created,
+            "started": self.started,
+            "finished": self.finished,
+            "error": self.error
+        }
+        if with_result and self.status == DONE:
+            out["result"] = self.result
+        return out
+
+
+class JobQueue:
+    """
+    In-process job runner: a bounded number of queued + running jobs on a
+    local thread pool, cooperative cancellation and TTL eviction of
+    finished jobs. Job bodies take the Job and should call job.report()
+    regularly so progress is visible and cancellation can take effect.
+    """
+
+    def __init__(self, workers: int = 2, max_pending: int = 16, ttl: float = 3600.0):
+        self.max_pending = max_pending
+        self.ttl = ttl
+        self.jobs: Dict[str, Job] = {}
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="job")
+        self._lock = threading.Lock()
+
+    @property
+    def pending(self) -> int:
+        return sum(job.status not in FINISHED for job in self.jobs.values())
+
+    def submit(self, kind: str, fn: Callable[[Job], Any]) -> Job:
+        with self._lock:
+            self._evict()
+            if self.pending >= self.max_pending:
+                raise QueueFull(f"{self.max_pending} jobs already pending")
+            job = Job(id=uuid.uuid4().hex, kind=kind)
+            self.jobs[job.id] = job
+            job._future = self._pool.submit(self._run, job, fn)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            self._evict()
+            return self.jobs.get(job_id)
+
+    def list(self) -> List[Job]:
+        with self._lock:
+            self._evict()
+            return list(self.jobs.values())
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        """Queued jobs are dropped at once; running ones stop at their next report()."""
+        job = self.get(job_id)
+        if job is None or job.status in FINISHED:
+            return job
+        job._cancel.set()
+        if job._future is not None and job._future.cancel():
+            job.status = CANCELLED
+            job.finished = time.time()
+        return job
+
+    def shutdown(self):
+        # Cancel queued futures by hand: shutdown(cancel_futures=True) is 3.9+
+        for job in self.list():
+            self.cancel(job.id)
+        self._pool.shutdown(wait=True)
+
+    def _run(self, job: Job, fn: Callable[[Job], Any]):
+        if job.cancel_requested:
+            job.status, job.finished = CANCELLED, time.time()
+            return
+        job.status, job.started = RUNNING, time.time()
+        try:
+            job.result = fn(job)
+            job.status, job.progress = DONE, 1.0
+        except JobCancelled:
+            job.status = CANCELLED
+        except Exception as e:
+            print(f"⚠️ Exception in job {job.id}:", str(e))
+            traceback.print_exc()
+            job.status, job.error = FAILED, str(e)
+        finally:
+            job.finished = time.time()
+
+    def _evict(self):
+        # Caller holds the lock
+        cutoff = time.time() - self.ttl
+        expired = [
+            jid for jid, job in self.jobs.items()
+            if job.status in FINISHED and job.finished is not None and job.finished < cutoff
+        ]
+        for jid in expired:
+            del self.jobs[jid]
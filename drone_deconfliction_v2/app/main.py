@@ -5,7 +5,7 @@ from pydantic import BaseModel
 from typing import List
 from .models import Waypoint, Mission
 from .trajectory_model import generate_ovbs
-from .conflict_detector import detect_conflicts_between_ovbs
+from .conflict_detector import detect_conflicts_between_ovbs, merge_episodes
 from .optimizer import resolve_with_delay
 
 app = FastAPI(title="Strategic UAV Deconfliction API", version="2.0")
@@ -42,12 +42,12 @@ def check_conflicts(primary: MissionInput, simulated: MissionInput):
 
         # Create Mission object for primary drone
         primary_mission = Mission(id=primary.id, waypoints=wp_primary)
-        delay = resolve_with_delay(primary_mission, conflicts)
+        delay = resolve_with_delay(primary_mission, merge_episodes(conflicts))
 
         return [
             ConflictResult(
-                drone_a=c.drone_a,
-                drone_b=c.drone_b,
+                drone_a=primary.id,
+                drone_b=c.with_id,
                 location=list(c.location),
                 time=c.time,
                 actual_gap=c.actual_gap,
@@ -1,14 +1,110 @@
-from typing import List, Tuple
-from dataclasses import dataclass
+from typing import Iterator, List, Sequence, Tuple, Union
+from collections.abc import Sequence as SequenceABC
+from dataclasses import FrozenInstanceError, dataclass, fields
+import numpy as np
 
-@dataclass
+
+def _slotted(cls):
+    """
+    Rebuilds a dataclass with __slots__ and no per-instance __dict__, like
+    dataclass(slots=True) on Python 3.10+. Frozen classes also get
+    __getstate__ / __setstate__, since the default slots pickling assigns
+    attributes one by one and a frozen class refuses that.
+    """
+    names = tuple(f.name for f in fields(cls))
+    namespace = dict(cls.__dict__)
+    for name in names + ("__dict__", "__weakref__"):
+        namespace.pop(name, None)
+    namespace["__slots__"] = names
+    frozen = cls.__dataclass_params__.frozen
+    if frozen:
+        namespace["__getstate__"] = lambda self: tuple(getattr(self, n) for n in names)
+        namespace["__setstate__"] = lambda self, state: [
+            object.__setattr__(self, n, v) for n, v in zip(names, state)
+        ]
+    slotted = type(cls)(cls.__name__, cls.__bases__, namespace)
+    slotted.__qualname__ = cls.__qualname__
+
+    if frozen:
+        # The dataclass-made pair calls super(cls, self), and cls is not a
+        # base of the rebuilt class; redo them against the new class
+        def __setattr__(self, name, value):
+            if type(self) is slotted or name in names:
+                raise FrozenInstanceError(f"cannot assign to field {name!r}")
+            super(slotted, self).__setattr__(name, value)
+
+        def __delattr__(self, name):
+            if type(self) is slotted or name in names:
+                raise FrozenInstanceError(f"cannot delete field {name!r}")
+            super(slotted, self).__delattr__(name)
+
+        for func in (__setattr__, __delattr__):
+            func.__qualname__ = f"{slotted.__qualname__}.{func.__name__}"
+            setattr(slotted, func.__name__, func)
+
+    # Zero-argument super() in the class body refers to the old class too
+    for member in namespace.values():
+        member = getattr(member, "__func__", member)
+        funcs = (member.fget, member.fset, member.fdel) if isinstance(member, property) else (member,)
+        for func in funcs:
+            code = getattr(func, "__code__", None)
+            if code is not None and "__class__" in code.co_freevars:
+                cell = func.__closure__[code.co_freevars.index("__class__")]
+                if cell.cell_contents is cls:
+                    cell.cell_contents = slotted
+    return slotted
+
+
+@_slotted
+@dataclass(frozen=True)
 class Waypoint:
     x: float
     y: float
     z: float
     t: float
 
-@dataclass
+
+class WaypointArray(SequenceABC):
+    """
+    A mission's waypoints as one (n, 4) float64 array of (x, y, z, t) rows.
+    Indexing builds a Waypoint from its row on demand; slicing returns a
+    WaypointArray view. Writes go through `array`.
+    """
+    __slots__ = ("array",)
+
+    def __init__(self, waypoints: Union["WaypointArray", Sequence[Waypoint], np.ndarray] = ()):
+        if isinstance(waypoints, WaypointArray):
+            array = waypoints.array.copy()
+        elif isinstance(waypoints, np.ndarray):
+            array = waypoints.astype(np.float64)
+        else:
+            array = np.array([(wp.x, wp.y, wp.z, wp.t) for wp in waypoints], dtype=np.float64)
+        self.array = array.reshape(-1, 4)
+
+    def __len__(self) -> int:
+        return len(self.array)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            view = WaypointArray.__new__(WaypointArray)
+            view.array = self.array[index]
+            return view
+        return Waypoint(*self.array[index].tolist())
+
+    def __iter__(self) -> Iterator[Waypoint]:
+        return (Waypoint(*row) for row in self.array.tolist())
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (WaypointArray, list, tuple)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"WaypointArray({list(self)!r})"
+
+
+@_slotted
+@dataclass(frozen=True)
 class OVB:
     drone_id: str
     center: Tuple[float, float, float]
@@ -22,6 +118,90 @@ class OVB:
 
 
 @dataclass
+class OVBBatch:
+    """
+    Struct-of-arrays form of many OVBs: row i of every column is one box.
+    `drone_index` points into the `drone_ids` lookup table.
+    """
+    drone_ids: List[str]
+    drone_index: np.ndarray   # int64 (n,)
+    centers: np.ndarray       # float64 (n, 3)
+    length: np.ndarray
+    width: np.ndarray
+    height: np.ndarray
+    heading: np.ndarray
+    speed: np.ndarray
+    entry_time: np.ndarray
+    exit_time: np.ndarray
+
+    COLUMNS = ("length", "width", "height", "heading", "speed", "entry_time", "exit_time")
+
+    def __len__(self) -> int:
+        return len(self.drone_index)
+
+    @classmethod
+    def empty(cls, drone_ids: Sequence[str] = ()) -> "OVBBatch":
+        return cls(
+            drone_ids=list(drone_ids),
+            drone_index=np.empty(0, dtype=np.int64),
+            centers=np.empty((0, 3)),
+            **{name: np.empty(0) for name in cls.COLUMNS}
+        )
+
+    @classmethod
+    def from_ovbs(cls, ovbs: Sequence[OVB]) -> "OVBBatch":
+        lookup = {}
+        for ovb in ovbs:
+            lookup.setdefault(ovb.drone_id, len(lookup))
+        return cls(
+            drone_ids=list(lookup),
+            drone_index=np.array([lookup[o.drone_id] for o in ovbs], dtype=np.int64),
+            centers=np.array([o.center for o in ovbs], dtype=np.float64).reshape(-1, 3),
+            **{name: np.array([getattr(o, name) for o in ovbs], dtype=np.float64)
+               for name in cls.COLUMNS}
+        )
+
+    @classmethod
+    def concat(cls, batches: Sequence["OVBBatch"]) -> "OVBBatch":
+        """Stacks batches, re-keying their drone indices into one lookup table."""
+        if not batches:
+            return cls.empty()
+        lookup = {}
+        remapped = []
+        for b in batches:
+            codes = np.array([lookup.setdefault(d, len(lookup)) for d in b.drone_ids], dtype=np.int64)
+            remapped.append(codes[b.drone_index] if len(b) else b.drone_index)
+        return cls(
+            drone_ids=list(lookup),
+            drone_index=np.concatenate(remapped),
+            centers=np.concatenate([b.centers for b in batches]),
+            **{name: np.concatenate([getattr(b, name) for b in batches]) for name in cls.COLUMNS}
+        )
+
+    def take(self, rows) -> "OVBBatch":
+        return OVBBatch(
+            drone_ids=self.drone_ids,
+            drone_index=self.drone_index[rows],
+            centers=self.centers[rows],
+            **{name: getattr(self, name)[rows] for name in self.COLUMNS}
+        )
+
+    def drone_id(self, row: int) -> str:
+        return self.drone_ids[self.drone_index[row]]
+
+    def to_ovbs(self) -> List[OVB]:
+        """Adapter back to per-box OVB objects for existing callers."""
+        ids = [self.drone_ids[i] for i in self.drone_index.tolist()]
+        centers = [tuple(c) for c in self.centers.tolist()]
+        cols = [getattr(self, name).tolist() for name in self.COLUMNS]
+        return [
+            OVB(ids[i], centers[i], *(col[i] for col in cols))
+            for i in range(len(ids))
+        ]
+
+
+@_slotted
+@dataclass(frozen=True)
 class Conflict:
     location: Tuple[float, float, float]
     time_a: float
@@ -31,11 +211,46 @@ class Conflict:
     time: float  # ✅ Add this line
     with_id: str                   # ✅ ID of conflicting drone
     severity: float = 0.0
-    
 
+
+@_slotted
+@dataclass(frozen=True)
+class ConflictEpisode:
+    """
+    A run of conflicts with one drone that overlap or nearly touch in time.
+    `location` and `time` are those of the most severe member; actual_gap is
+    chosen so that required_gap - actual_gap is the largest member deficit,
+    which keeps resolve_with_delay's answer unchanged.
+    """
+    with_id: str
+    start_time: float
+    end_time: float
+    location: Tuple[float, float, float]
+    time: float
+    actual_gap: float
+    required_gap: float   # largest over the members
+    severity: float       # worst over the members
+    conflict_count: int
+
+
+@_slotted
 @dataclass
 class Mission:
     id: str
-    waypoints: List[Waypoint]
+    waypoints: WaypointArray   # any Waypoint sequence or (n, 4) array is converted
     priority: int = 1
     delay: float = 0.0
+
+    def shift_times(self, delay: float):
+        """Delays every waypoint by `delay` seconds with one vector add."""
+        self.waypoints.array[:, 3] += delay
+
+
+def _converting_slot(slot, convert):
+    """Property over a slot's member descriptor that converts every assignment."""
+    return property(slot.__get__, lambda self, value: slot.__set__(self, convert(value)))
+
+
+# __init__, replace() and unpickling assign through it, and so does any later
+# `mission.waypoints = [...]`, so waypoints is always a WaypointArray
+Mission.waypoints = _converting_slot(Mission.__dict__["waypoints"], WaypointArray)
@@ -1,31 +1,144 @@
-from scipy.optimize import linprog
-from typing import List, Dict
-from .models import Conflict, Mission
+from scipy.optimize import Bounds, LinearConstraint, linprog, milp
+from scipy.sparse import coo_matrix
+import numpy as np
+from typing import List, Dict, Optional, Union
+from .models import Conflict, ConflictEpisode, Mission
 
-def resolve_with_delay(primary: Mission, conflicts: List[Conflict], max_delay: float = 120.0) -> float:
+def resolve_with_delay(primary: Mission, conflicts: List[Union[Conflict, ConflictEpisode]],
+                       max_delay: float = 120.0) -> float:
     """
     Returns optimal delay (in seconds) for the primary mission that avoids conflicts.
-    Minimizes total delay using LP (based on NASA formulation)
+    Minimizes total delay (based on NASA formulation):
+
+        min delay  s.t.  delay >= required_gap - actual_gap  for each conflict
+                         0 <= delay <= max_delay
+
+    With a single variable the LP optimum is the largest gap deficit, so it is
+    computed in closed form instead of calling the solver. Episodes from
+    merge_episodes carry their members' largest deficit, so passing them
+    instead of raw conflicts gives the same delay from far fewer rows.
     """
     if not conflicts:
         return 0.0
 
-    # Objective: Minimize delay (scalar)
-    c = [1.0]
+    delay = max(0.0, max(c.required_gap - c.actual_gap for c in conflicts))
+    if delay <= max_delay:
+        return delay
+    else:
+        return -1.0  # signal failure
+
+
+def resolve_fleet(missions: List[Mission], conflicts: Dict[str, List[Conflict]],
+                  max_delay: Union[float, Dict[str, float]] = 120.0,
+                  optimal_order: bool = False) -> Optional[Dict[str, float]]:
+    """
+    Coordinated delays for a whole fleet in one sparse HiGHS solve.
+
+        min  sum(priority_i * delay_i)
+        s.t. delay_i - delay_j >= need_i   for each conflicting pair where i yields
+             0 <= delay_i <= max_delay_i
+
+    `conflicts` maps a mission id to the conflicts seen from that mission;
+    need_i is the largest required_gap - (time_i - time_j) over the pair's
+    conflicts. By default the lower priority yields (equal priorities: the
+    later departure), which keeps the problem a plain LP. With
+    `optimal_order=True` a binary per pair lets the MILP choose who yields,
+    which is exact but much slower on dense clusters. A conflict with a
+    drone outside `missions` is fixed traffic: delay_i >= required_gap -
+    actual_gap, as in resolve_with_delay.
+    Returns {mission id: delay}, or None if infeasible.
+    """
+    if not missions:
+        return {}
+    bounds = [
+        max_delay.get(m.id, 120.0) if isinstance(max_delay, dict) else max_delay
+        for m in missions
+    ]
+    if len(missions) == 1:
+        delay = resolve_with_delay(missions[0], conflicts.get(missions[0].id, []), bounds[0])
+        return {missions[0].id: delay} if delay >= 0 else None
+
+    col = {m.id: i for i, m in enumerate(missions)}
+    lower = np.zeros(len(missions))
 
-    # Constraints: delay >= required_gap - actual_gap for each conflict
-    A = [[-1.0] for _ in conflicts]
-    b = []
-    for conflict in conflicts:
-        gap_needed = conflict.required_gap - conflict.actual_gap
-        b.append(-gap_needed)  # negative because of -1 coefficient in A
+    # Signed time offsets (first - second) of every conflict per drone pair
+    offsets: Dict[tuple, List[tuple]] = {}
+    for drone_id, found in conflicts.items():
+        if drone_id not in col:
+            continue
+        for c in found:
+            if c.with_id not in col:
+                lower[col[drone_id]] = max(lower[col[drone_id]], c.required_gap - c.actual_gap)
+                continue
+            pair = tuple(sorted((drone_id, c.with_id)))
+            s = c.time_a - c.time_b
+            offsets.setdefault(pair, []).append((s if pair[0] == drone_id else -s, c.required_gap))
 
-    # Bounds: delay ∈ [0, max_delay]
-    bounds = [(0.0, max_delay)]
+    needs = []
+    for (first, second), pairs in offsets.items():
+        first_late = max(req - s for s, req in pairs)
+        second_late = max(req + s for s, req in pairs)
+        if first_late > 0 and second_late > 0:  # otherwise one order already works
+            needs.append((col[first], col[second], first_late, second_late))
 
-    result = linprog(c, A_ub=A, b_ub=b, bounds=bounds, method='highs')
+    upper = np.array(bounds, dtype=float)
+    if np.any(lower > upper):
+        return None
+    if not needs:
+        return {m.id: float(lower[i]) for i, m in enumerate(missions)}
+
+    weights = [float(m.priority) for m in missions]
+    if optimal_order:
+        result = _solve_ordering_milp(needs, weights, lower, upper)
+    else:
+        result = _solve_fixed_order_lp(missions, needs, weights, lower, upper)
 
     if result.success:
-        return result.x[0]  # optimal delay value
+        return {m.id: max(0.0, float(result.x[i])) for i, m in enumerate(missions)}
     else:
-        return -1.0  # signal failure
\ No newline at end of file
+        return None  # signal failure
+
+
+def _solve_fixed_order_lp(missions, needs, weights, lower, upper):
+    # Right of way: higher priority first, then earlier departure
+    def rank(i):
+        m = missions[i]
+        return (-m.priority, m.waypoints[0].t if m.waypoints else 0.0, m.id)
+
+    rows, cols, vals, b = [], [], [], []
+    for k, (i, j, need_i, need_j) in enumerate(needs):
+        late, early, need = (i, j, need_i) if rank(i) > rank(j) else (j, i, need_j)
+        # -delay_late + delay_early <= -need
+        rows += [k, k]
+        cols += [late, early]
+        vals += [-1.0, 1.0]
+        b.append(-need)
+
+    A = coo_matrix((vals, (rows, cols)), shape=(len(needs), len(missions))).tocsr()
+    return linprog(weights, A_ub=A, b_ub=b, bounds=list(zip(lower, upper)), method='highs')
+
+
+def _solve_ordering_milp(needs, weights, lower, upper):
+    # Variables: delays (n), then one order binary per pair (y=0: i yields)
+    n, p = len(weights), len(needs)
+    rows, cols, vals, lb = [], [], [], []
+    for k, (i, j, need_i, need_j) in enumerate(needs):
+        big_m = upper[i] + upper[j] + max(need_i, need_j)
+        # delay_i - delay_j + M*y >= need_i
+        rows += [2 * k] * 3
+        cols += [i, j, n + k]
+        vals += [1.0, -1.0, big_m]
+        lb.append(need_i)
+        # delay_j - delay_i - M*y >= need_j - M
+        rows += [2 * k + 1] * 3
+        cols += [j, i, n + k]
+        vals += [1.0, -1.0, -big_m]
+        lb.append(need_j - big_m)
+
+    A = coo_matrix((vals, (rows, cols)), shape=(2 * p, n + p)).tocsr()
+    return milp(
+        c=np.concatenate([weights, np.zeros(p)]),
+        constraints=LinearConstraint(A, lb=lb, ub=np.inf),
+        integrality=np.concatenate([np.zeros(n), np.ones(p)]),
+        bounds=Bounds(np.concatenate([lower, np.zeros(p)]), np.concatenate([upper, np.ones(p)]))
+    )
@@ -0,0 +1,165 @@
+# app/reservations.py
+
+from typing import Dict, List, Sequence, Set, Tuple
+import sys
+import threading
+import numpy as np
+from app.conflict_detector import conflicts_from_pairs
+from app.models import OVB, OVBBatch, Conflict
+from app.utils.broad_phase import _expand, _overlapping, bounds_array
+
+# Odd multipliers for the (x, y, z, t) voxel hash
+_PRIMES = np.array([73856093, 19349663, 83492791, 49979687], dtype=np.int64)
+
+
+class ReservationTable:
+    """
+    Time-expanded occupancy table: every reserved OVB is rasterized into the
+    (x, y, z, t) voxels its 4D bounds cover, and each voxel keeps the keys of
+    the boxes touching it. Admitting a mission only looks up its own voxels;
+    the exact narrow phase then runs on the boxes sharing one with it.
+
+    Voxel sizes trade memory for selectivity: a box spans about
+    (length / cell_size)^2 * (height / z_size) * (duration / t_size) voxels,
+    so long-lived boxes on a fine time axis get expensive. Hash collisions
+    only add candidates.
+    """
+
+    def __init__(self, cell_size: float = 50.0, z_size: float = 20.0, t_size: float = 10.0):
+        self.sizes = np.array([cell_size, cell_size, z_size, t_size], dtype=np.float64)
+        self.voxels: Dict[int, Set[int]] = {}
+        self.boxes: Dict[int, OVB] = {}
+        self._box_keys: Dict[str, List[int]] = {}
+        self._box_voxels: Dict[int, np.ndarray] = {}
+        self._end_time: Dict[str, float] = {}
+        self._next_key = 0
+        self._lock = threading.RLock()
+
+    def __contains__(self, drone_id: str) -> bool:
+        return drone_id in self._box_keys
+
+    def __len__(self) -> int:
+        return len(self._box_keys)
+
+    @property
+    def drone_ids(self) -> List[str]:
+        return list(self._box_keys)
+
+    def voxel_keys(self, ovbs: Sequence[OVB]) -> Tuple[np.ndarray, np.ndarray]:
+        """(box row, voxel hash) for every voxel covered by every box."""
+        bounds = bounds_array(ovbs).reshape(-1, 8)
+        lo = np.floor(bounds[:, :4] / self.sizes).astype(np.int64)
+        span = np.floor(bounds[:, 4:] / self.sizes).astype(np.int64) - lo + 1
+        owner, local = _expand(np.zeros(len(bounds), dtype=np.int64), np.prod(span, axis=1))
+        cell = np.empty((len(owner), 4), dtype=np.int64)
+        for axis in range(4):
+            cell[:, axis] = lo[owner, axis] + local % span[owner, axis]
+            local = local // span[owner, axis]
+        hashed = np.bitwise_xor.reduce(cell * _PRIMES, axis=1)
+        return owner, hashed
+
+    def reserve(self, drone_id: str, ovbs: Sequence[OVB]) -> int:
+        """Books a mission's boxes; returns the number of voxels written."""
+        rows, hashed = self.voxel_keys(ovbs)
+        with self._lock:
+            if drone_id in self._box_keys:
+                raise ValueError(f"Mission '{drone_id}' is already reserved")
+            keys = list(range(self._next_key, self._next_key + len(ovbs)))
+            self._next_key += len(ovbs)
+            self._box_keys[drone_id] = keys
+            self._end_time[drone_id] = max((o.exit_time for o in ovbs), default=float("-inf"))
+            bounds = np.searchsorted(rows, np.arange(len(ovbs) + 1))
+            for i, (key, ovb) in enumerate(zip(keys, ovbs)):
+                mine = np.unique(hashed[bounds[i]:bounds[i + 1]])
+                self.boxes[key] = ovb
+                self._box_voxels[key] = mine
+                for voxel in mine.tolist():
+                    self.voxels.setdefault(voxel, set()).add(key)
+            return len(hashed)
+
+    def release(self, drone_id: str) -> int:
+        """Frees every voxel entry of a mission; returns how many were dropped."""
+        with self._lock:
+            freed = 0
+            self._end_time.pop(drone_id)
+            for key in self._box_keys.pop(drone_id):
+                del self.boxes[key]
+                for voxel in self._box_voxels.pop(key).tolist():
+                    owners = self.voxels[voxel]
+                    owners.discard(key)
+                    if not owners:
+                        del self.voxels[voxel]
+                    freed += 1
+            return freed
+
+    def release_completed(self, now: float) -> List[str]:
+        """Releases every mission whose last box was exited before `now`."""
+        with self._lock:
+            done = [d for d, end in self._end_time.items() if end < now]
+            for drone_id in done:
+                self.release(drone_id)
+            return done
+
+    def query_pairs(self, ovbs: Sequence[OVB], exclude_ids: Sequence[str] = ()) -> Tuple[List[int], List[OVB]]:
+        """
+        Every (row in `ovbs`, reserved box) pair sharing a voxel and whose
+        bounds intersect, minus excluded drones; same shape as
+        AirspaceRegistry.query_pairs.
+        """
+        excluded = set(exclude_ids)
+        rows, hashed = self.voxel_keys(ovbs)
+        pairs = set()
+        with self._lock:
+            for row, voxel in zip(rows.tolist(), hashed.tolist()):
+                for key in self.voxels.get(voxel, ()):
+                    pairs.add((row, key))
+            pairs = sorted(pairs)
+            candidates = [self.boxes[key] for _, key in pairs]
+        keep = [i for i, ob in enumerate(candidates) if ob.drone_id not in excluded]
+        rows = np.array([pairs[i][0] for i in keep], dtype=np.int64)
+        candidates = [candidates[i] for i in keep]
+        if not keep:
+            return [], []
+        # Sharing a voxel is coarser than the bounds test the other indexes apply
+        hit = _overlapping(bounds_array(ovbs)[rows], bounds_array(candidates))
+        return rows[hit].tolist(), [c for c, h in zip(candidates, hit.tolist()) if h]
+
+    def check(self, ovbs: Sequence[OVB], exclude_ids: Sequence[str] = ()) -> List[Conflict]:
+        """Exact conflicts of `ovbs` against reserved boxes sharing a voxel with them."""
+        rows, candidates = self.query_pairs(ovbs, exclude_ids)
+        if not rows:
+            return []
+        return conflicts_from_pairs(
+            OVBBatch.from_ovbs(ovbs), OVBBatch.from_ovbs(candidates), rows, np.arange(len(candidates))
+        )
+
+    def admit(self, drone_id: str, ovbs: Sequence[OVB]) -> List[Conflict]:
+        """Reserves the mission if it is conflict-free; returns the conflicts otherwise."""
+        with self._lock:
+            if drone_id in self._box_keys:
+                raise ValueError(f"Mission '{drone_id}' is already reserved")
+            conflicts = self.check(ovbs, exclude_ids=[drone_id])
+            if not conflicts:
+                self.reserve(drone_id, ovbs)
+            return conflicts
+
+    def memory_bytes(self) -> int:
+        """Approximate bytes held by the voxel hash and the per-box voxel lists."""
+        with self._lock:
+            return (
+                sys.getsizeof(self.voxels)
+                + sum(sys.getsizeof(owners) for owners in self.voxels.values())
+                + sum(v.nbytes for v in self._box_voxels.values())
+                + sys.getsizeof(self.boxes)
+            )
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "missions": len(self._box_keys),
+                "boxes": len(self.boxes),
+                "voxels": len(self.voxels),
+                "voxel_entries": sum(len(v) for v in self._box_voxels.values()),
+                "memory_bytes": self.memory_bytes(),
+                "voxel_size": self.sizes.tolist()
+            }
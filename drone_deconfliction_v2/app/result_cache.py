@@ -0,0 +1,102 @@
+# app/result_cache.py
+
+from dataclasses import replace
+from typing import Dict, List, Sequence, Tuple
+import hashlib
+import numpy as np
+from app.conflict_detector import PairConflicts, narrow_phase
+from app.models import OVBBatch
+from app.trajectory_model import generate_ovbs_batch
+from app.utils.broad_phase import bounds_array, sweep_pairs
+from app.utils.lru import LRUCache
+
+
+def route_key(waypoints: np.ndarray, buffer: float) -> str:
+    """Content hash of one drone's (n, 4) waypoint rows and OVB width."""
+    wps = np.ascontiguousarray(waypoints, dtype=np.float64).reshape(-1, 4)
+    digest = hashlib.blake2b(wps.tobytes(), digest_size=16)
+    digest.update(np.float64(buffer).tobytes())
+    return digest.hexdigest()
+
+
+class AnalysisCache:
+    """
+    Content-addressed cache for /analyze. OVBs are cached per drone route
+    hash, and the conflicting box pairs per (primary hash, traffic hash), so
+    a resubmitted request only rebuilds and re-checks the drones whose
+    waypoints or buffer changed. `max_bytes` is split between the two LRUs.
+    """
+
+    def __init__(self, max_bytes: int = 64 << 20, ovb_share: float = 0.5):
+        self.ovbs = LRUCache(int(max_bytes * ovb_share))
+        self.pairs = LRUCache(max_bytes - self.ovbs.max_bytes)
+
+    def route_ovbs(self, key: str, waypoints: np.ndarray, buffer: float) -> OVBBatch:
+        batch = self.ovbs.get(key)
+        if batch is None:
+            batch = generate_ovbs_batch(waypoints, "", width=buffer)
+            self.ovbs.put(key, batch)
+        return batch
+
+    def conflicting_pairs(self, primary_id: str, primary_wps: np.ndarray, buffer: float,
+                          traffic: Sequence[Tuple[str, np.ndarray]],
+                          traffic_buffer: float) -> Tuple[OVBBatch, OVBBatch, np.ndarray, np.ndarray]:
+        """
+        (primary boxes, traffic boxes, primary rows, traffic rows) of every
+        conflicting pair; only uncached (primary, drone) pairs are checked.
+        """
+        p_key = route_key(primary_wps, buffer)
+        primary = replace(self.route_ovbs(p_key, primary_wps, buffer), drone_ids=[primary_id])
+        keys = [route_key(wps, traffic_buffer) for _, wps in traffic]
+        batches = [self.route_ovbs(k, wps, traffic_buffer) for k, (_, wps) in zip(keys, traffic)]
+
+        results: Dict[int, PairConflicts] = {}
+        missing = []
+        for d, key in enumerate(keys):
+            cached = self.pairs.get((p_key, key))
+            if cached is None:
+                missing.append(d)
+            else:
+                results[d] = cached
+        if missing:
+            results.update(zip(missing, self._check(primary, [batches[d] for d in missing])))
+            for d in missing:
+                self.pairs.put((p_key, keys[d]), results[d])
+
+        # Stack the traffic in request order, one drone id per route
+        offsets = np.concatenate([[0], np.cumsum([len(b) for b in batches])]).astype(np.int64)
+        stacked = OVBBatch.concat([
+            replace(b, drone_ids=[drone_id]) for b, (drone_id, _) in zip(batches, traffic)
+        ]) if batches else OVBBatch.empty()
+        ia = [results[d].ia for d in range(len(batches))]
+        ib = [results[d].ib + offsets[d] for d in range(len(batches))]
+        ia = np.concatenate(ia) if ia else np.empty(0, dtype=np.int64)
+        ib = np.concatenate(ib) if ib else np.empty(0, dtype=np.int64)
+        order = np.lexsort((ib, ia))
+        return primary, stacked, ia[order], ib[order]
+
+    @staticmethod
+    def _check(primary: OVBBatch, batches: List[OVBBatch]) -> List[PairConflicts]:
+        """One broad + narrow phase over all uncached drones, split back per drone."""
+        sizes = [len(b) for b in batches]
+        offsets = np.concatenate([[0], np.cumsum(sizes)]).astype(np.int64)
+        traffic = OVBBatch.concat(batches)
+        ia, ib = sweep_pairs(bounds_array(primary).reshape(-1, 8), bounds_array(traffic).reshape(-1, 8))
+        found = narrow_phase(primary, traffic, ia, ib)
+        owner = np.searchsorted(offsets, found.ib, side="right") - 1
+        out = []
+        for d in range(len(batches)):
+            mine = owner == d
+            out.append(PairConflicts(
+                ia=found.ia[mine], ib=found.ib[mine] - offsets[d],
+                actual_gap=found.actual_gap[mine], required_gap=found.required_gap[mine],
+                severity=found.severity[mine]
+            ))
+        return out
+
+    def clear(self):
+        self.ovbs.clear()
+        self.pairs.clear()
+
+    def stats(self) -> dict:
+        return {"ovbs": self.ovbs.stats(), "pairs": self.pairs.stats()}
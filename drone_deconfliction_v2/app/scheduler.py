@@ -0,0 +1,89 @@
+# app/scheduler.py
+
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Set
+from .agent import DroneAgent
+from .airspace import AirspaceRegistry
+from .optimizer import resolve_with_delay
+
+
+@dataclass
+class ScheduleResult:
+    converged: bool
+    iterations: int
+    delays: Dict[str, float]                 # total delay applied per agent
+    unresolved: List[str] = field(default_factory=list)
+    checks: int = 0                          # conflict checks performed
+
+
+class ResolutionScheduler:
+    """
+    Resolves a fleet agent by agent, lowest `Mission.priority` first, on a
+    shared AirspaceRegistry. After each delay only that agent's boxes are
+    swapped in the index, and only the agents whose boxes touch its old or
+    new volume are re-checked in the next pass.
+    """
+
+    def __init__(self, agents: Iterable[DroneAgent], airspace: Optional[AirspaceRegistry] = None,
+                 max_iterations: int = 20, max_delay: float = 120.0):
+        self.agents: Dict[str, DroneAgent] = {a.mission.id: a for a in agents}
+        if airspace is None:
+            backend = next(iter(self.agents.values())).broad_phase if self.agents else "rtree"
+            airspace = AirspaceRegistry(backend=backend)
+        self.airspace = airspace
+        self.max_iterations = max_iterations
+        self.max_delay = max_delay
+        for aid, agent in self.agents.items():
+            if aid not in self.airspace:
+                self.airspace.insert_ovbs(aid, agent.ovbs)
+
+    def _check(self, agent: DroneAgent):
+        agent.resolved = False
+        agent.check_conflict_in(self.airspace)
+
+    def run(self, progress: Optional[Callable[[int, int, int], None]] = None) -> ScheduleResult:
+        """`progress(pass, agents done, agents in pass)` is called before every check."""
+        delays = {aid: 0.0 for aid in self.agents}
+        failed: Set[str] = set()
+        dirty: Set[str] = set(self.agents)
+        checks = 0
+        iterations = 0
+
+        while dirty and iterations < self.max_iterations:
+            iterations += 1
+            next_dirty: Set[str] = set()
+            order = sorted(dirty, key=lambda aid: (self.agents[aid].mission.priority, aid))
+            for position, aid in enumerate(order):
+                if progress is not None:
+                    progress(iterations, position, len(order))
+                agent = self.agents[aid]
+                # Earlier agents in this pass may have moved, so check right before resolving
+                self._check(agent)
+                checks += 1
+                if not agent.conflicts:
+                    failed.discard(aid)
+                    continue
+
+                delay = resolve_with_delay(agent.mission, agent.episodes, self.max_delay - delays[aid])
+                if delay <= 0:
+                    failed.add(aid)  # out of delay budget; stays in conflict
+                    continue
+
+                old_ovbs = agent.ovbs
+                agent.apply_delay(delay)
+                delays[aid] += delay
+                self.airspace.replace_ovbs(aid, agent.ovbs)
+                next_dirty.add(aid)
+                next_dirty |= self.airspace.drones_touching(old_ovbs + agent.ovbs, exclude_ids=[aid])
+            dirty = next_dirty
+
+        for aid, agent in self.agents.items():
+            agent.delay = delays[aid]
+            agent.resolved = aid not in failed and aid not in dirty
+        return ScheduleResult(
+            converged=not dirty and not failed,
+            iterations=iterations,
+            delays=delays,
+            unresolved=sorted(failed | dirty),
+            checks=checks
+        )
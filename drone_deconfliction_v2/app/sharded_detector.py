@@ -0,0 +1,264 @@
+# app/sharded_detector.py
+
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import multiprocessing
+import threading
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+import numpy as np
+from app.conflict_detector import PairConflicts, build_conflicts, narrow_phase
+from app.models import Conflict, OVBBatch
+from app.utils.broad_phase import _expand, bounds_array, sweep_pairs
+
+# Per-box columns of the packed (n, 11) float64 block; the last is a drone code
+# common to both batches, so same-drone pairs can be skipped without the ids
+_COLUMNS = ("cx", "cy", "cz") + OVBBatch.COLUMNS + ("drone",)
+
+
+class SharedArray(NamedTuple):
+    """Name, shape and dtype of an array in shared memory: all a worker needs to attach."""
+    name: str
+    shape: Tuple[int, ...]
+    dtype: str
+
+
+def process_pool(workers: int) -> ProcessPoolExecutor:
+    """
+    Process pool for the detectors. Pools are started from request and job
+    threads, where fork() may copy a held lock, so workers come from a
+    forkserver (spawn where that is unavailable).
+    """
+    method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(method))
+
+
+def share_arrays(arrays: Sequence[np.ndarray]):
+    """Copies arrays into new shared-memory blocks; returns (blocks, specs)."""
+    blocks, specs = [], []
+    try:
+        for array in arrays:
+            block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            blocks.append(block)
+            np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+            specs.append(SharedArray(block.name, array.shape, array.dtype.str))
+    except Exception:
+        release_arrays(blocks)
+        raise
+    return blocks, specs
+
+
+def attach_arrays(specs: Sequence[SharedArray]):
+    """Worker side of share_arrays: (blocks, zero-copy array views)."""
+    blocks = [shared_memory.SharedMemory(name=spec.name) for spec in specs]
+    arrays = [np.ndarray(spec.shape, dtype=spec.dtype, buffer=block.buf) for spec, block in zip(specs, blocks)]
+    return blocks, arrays
+
+
+def release_arrays(blocks, unlink: bool = True):
+    for block in blocks:
+        block.close()
+        if unlink:
+            block.unlink()
+
+
+def _pack(batch: OVBBatch, codes: np.ndarray) -> np.ndarray:
+    return np.column_stack(
+        [batch.centers] + [getattr(batch, name) for name in OVBBatch.COLUMNS] + [codes[batch.drone_index]]
+    ).astype(np.float64).reshape(-1, len(_COLUMNS))
+
+
+def _unpack(block: np.ndarray) -> OVBBatch:
+    """Zero-copy OVBBatch view over a packed block (drone_index is the shared code)."""
+    return OVBBatch(
+        drone_ids=[],
+        drone_index=block[:, -1].astype(np.int64),
+        centers=block[:, :3],
+        **{name: block[:, 3 + k] for k, name in enumerate(OVBBatch.COLUMNS)}
+    )
+
+
+def _empty_pairs() -> PairConflicts:
+    empty = np.empty(0)
+    return PairConflicts(np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), empty, empty, empty)
+
+
+def _concat_pairs(parts: Sequence[PairConflicts]) -> PairConflicts:
+    if not parts:
+        return _empty_pairs()
+    return PairConflicts(*(np.concatenate(col) for col in zip(*parts)))
+
+
+def _detect_tiles(query: np.ndarray, traffic: np.ndarray, q_order: np.ndarray, q_offsets: np.ndarray,
+                  t_order: np.ndarray, t_offsets: np.ndarray, start: int, stop: int,
+                  z_buffer: float, t_buffer: float) -> PairConflicts:
+    """Broad + narrow phase for tiles start..stop-1, in global row numbers."""
+    a, b = _unpack(query), _unpack(traffic)
+    q_bounds = bounds_array(a, z_buffer, t_buffer)
+    t_bounds = bounds_array(b)
+    found = []
+    for tile in range(start, stop):
+        q_rows = q_order[q_offsets[tile]:q_offsets[tile + 1]]
+        t_rows = t_order[t_offsets[tile]:t_offsets[tile + 1]]
+        rows, cols = sweep_pairs(q_bounds[q_rows], t_bounds[t_rows])
+        ia, ib = q_rows[rows], t_rows[cols]
+        keep = a.drone_index[ia] != b.drone_index[ib]
+        if np.any(keep):
+            found.append(narrow_phase(a, b, ia[keep], ib[keep]))
+    return _concat_pairs(found)
+
+
+def _detect_shared(specs: Sequence[SharedArray], start: int, stop: int,
+                   z_buffer: float, t_buffer: float) -> PairConflicts:
+    """Process-pool entry point: attaches to the parent's shared blocks by name."""
+    blocks, arrays = attach_arrays(specs)
+    try:
+        pairs = _detect_tiles(*arrays, start, stop, z_buffer, t_buffer)
+        # Copy out before the blocks are closed
+        return PairConflicts(*(np.array(col) for col in pairs))
+    finally:
+        release_arrays(blocks, unlink=False)
+
+
+def _sort_unique(pairs: PairConflicts, n_traffic: int) -> PairConflicts:
+    """Orders pairs by (query row, traffic row) and drops repeats."""
+    code = pairs.ia * max(n_traffic, 1) + pairs.ib
+    _, first = np.unique(code, return_index=True)
+    return PairConflicts(*(col[first] for col in pairs))
+
+
+def drone_codes(query: OVBBatch, traffic: OVBBatch) -> Tuple[np.ndarray, np.ndarray]:
+    """Per-batch arrays mapping drone_index to one code space shared by both."""
+    lookup = {}
+    q = np.array([lookup.setdefault(d, len(lookup)) for d in query.drone_ids], dtype=np.int64)
+    t = np.array([lookup.setdefault(d, len(lookup)) for d in traffic.drone_ids], dtype=np.int64)
+    return q, t
+
+
+def detect_serial(query: OVBBatch, traffic: OVBBatch, z_buffer: float = 0.0,
+                  t_buffer: float = 0.0) -> List[Conflict]:
+    """
+    Single-core reference: every query box against every traffic box of
+    another drone, conflicts ordered by (query row, traffic row).
+    """
+    q_codes, t_codes = drone_codes(query, traffic)
+    ia, ib = sweep_pairs(bounds_array(query, z_buffer, t_buffer).reshape(-1, 8),
+                         bounds_array(traffic).reshape(-1, 8))
+    keep = q_codes[query.drone_index[ia]] != t_codes[traffic.drone_index[ib]]
+    pairs = narrow_phase(query, traffic, ia[keep], ib[keep])
+    return build_conflicts(query, traffic, _sort_unique(pairs, len(traffic)))
+
+
+class ShardedDetector:
+    """
+    Conflict detection split over (x, y) airspace tiles of `tile_size` meters.
+
+    Each query box belongs to the tile holding its center; a tile also gets
+    every traffic box within a halo sized to the largest query footprint, so
+    no pair crossing a tile edge is missed. Tiles are processed in chunks on a
+    process pool; the packed box columns and tile tables live in shared
+    memory, so tasks carry only block names and tile ranges. Pairs are merged
+    by (query row, traffic row), which drops any pair seen by two tiles and
+    reproduces detect_serial exactly.
+    """
+
+    def __init__(self, tile_size: float = 500.0, workers: int = 1, chunks_per_worker: int = 4):
+        self.tile_size = tile_size
+        self.workers = workers
+        self.chunks_per_worker = chunks_per_worker
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()  # request threads share one detector
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
+
+    def tiles(self, query: OVBBatch, traffic: OVBBatch):
+        """
+        (q_order, q_offsets, t_order, t_offsets): query rows and traffic rows
+        (halo included) of every non-empty tile, grouped by tile.
+        """
+        q_bounds = bounds_array(query).reshape(-1, 8)
+        t_bounds = bounds_array(traffic).reshape(-1, 8)
+        cells = np.floor(query.centers[:, :2] / self.tile_size).astype(np.int64)
+        halo = float(np.max(np.maximum(
+            q_bounds[:, 4] - q_bounds[:, 0], q_bounds[:, 5] - q_bounds[:, 1]
+        ))) / 2 if len(query) else 0.0
+
+        # Query rows: one owning tile each
+        base = cells.min(axis=0) if len(query) else np.zeros(2, dtype=np.int64)
+        extent = (cells.max(axis=0) - base + 1) if len(query) else np.ones(2, dtype=np.int64)
+        q_keys = (cells[:, 0] - base[0]) * extent[1] + (cells[:, 1] - base[1])
+        tile_keys, q_tile = np.unique(q_keys, return_inverse=True)
+        q_order = np.argsort(q_tile, kind="stable")
+        q_offsets = np.searchsorted(q_tile[q_order], np.arange(len(tile_keys) + 1))
+
+        # Traffic rows: every tile within reach of their bounds plus the halo
+        lo = np.floor((t_bounds[:, :2] - halo) / self.tile_size).astype(np.int64) - base
+        hi = np.floor((t_bounds[:, 4:6] + halo) / self.tile_size).astype(np.int64) - base
+        lo, hi = np.maximum(lo, 0), np.minimum(hi, extent - 1)
+        span = np.maximum(hi - lo + 1, 0)
+        owner, local = _expand(np.zeros(len(traffic), dtype=np.int64), span[:, 0] * span[:, 1])
+        sy = span[owner, 1]
+        keys = (lo[owner, 0] + local // sy) * extent[1] + lo[owner, 1] + local % sy
+        tile = np.searchsorted(tile_keys, keys)
+        known = tile < len(tile_keys)
+        known[known] = tile_keys[tile[known]] == keys[known]
+        owner, tile = owner[known], tile[known]
+        order = np.lexsort((owner, tile))
+        t_order = owner[order]
+        t_offsets = np.searchsorted(tile[order], np.arange(len(tile_keys) + 1))
+        return q_order, q_offsets, t_order, t_offsets
+
+    def _chunks(self, q_offsets: np.ndarray, t_offsets: np.ndarray) -> List[Tuple[int, int]]:
+        """Contiguous tile ranges of roughly equal pair work."""
+        n_tiles = len(q_offsets) - 1
+        cost = np.cumsum(np.diff(q_offsets) * np.diff(t_offsets))
+        parts = max(1, min(n_tiles, self.workers * self.chunks_per_worker))
+        if not n_tiles or cost[-1] == 0:
+            return [(0, n_tiles)] if n_tiles else []
+        cuts = np.searchsorted(cost, cost[-1] * np.arange(1, parts) / parts, side="right")
+        bounds = np.unique(np.concatenate([[0], cuts, [n_tiles]]))
+        return list(zip(bounds[:-1].tolist(), bounds[1:].tolist()))
+
+    def detect_pairs(self, query: OVBBatch, traffic: OVBBatch, z_buffer: float = 0.0,
+                     t_buffer: float = 0.0) -> PairConflicts:
+        q_codes, t_codes = drone_codes(query, traffic)
+        q_block, t_block = _pack(query, q_codes), _pack(traffic, t_codes)
+        q_order, q_offsets, t_order, t_offsets = self.tiles(query, traffic)
+        chunks = self._chunks(q_offsets, t_offsets)
+
+        if self.workers <= 1 or len(chunks) <= 1:
+            parts = [
+                _detect_tiles(q_block, t_block, q_order, q_offsets, t_order, t_offsets,
+                              start, stop, z_buffer, t_buffer)
+                for start, stop in chunks
+            ]
+            return _sort_unique(_concat_pairs(parts), len(traffic))
+
+        blocks, specs = share_arrays([q_block, t_block, q_order, q_offsets, t_order, t_offsets])
+        try:
+            with self._lock:
+                if self._pool is None:
+                    self._pool = process_pool(self.workers)
+                futures = [
+                    self._pool.submit(_detect_shared, specs, start, stop, z_buffer, t_buffer)
+                    for start, stop in chunks
+                ]
+            parts = [f.result() for f in futures]
+        finally:
+            release_arrays(blocks)
+        return _sort_unique(_concat_pairs(parts), len(traffic))
+
+    def detect(self, query: OVBBatch, traffic: OVBBatch, z_buffer: float = 0.0,
+               t_buffer: float = 0.0) -> List[Conflict]:
+        """Conflicts of query boxes with traffic boxes of other drones, as detect_serial."""
+        pairs = self.detect_pairs(query, traffic, z_buffer, t_buffer)
+        return build_conflicts(query, traffic, pairs)
@@ -1,66 +1,202 @@
 from shapely.geometry import LineString
 from .models import Waypoint, OVB
-from app.models import Waypoint, OVB
-from typing import List
+from app.models import Waypoint, WaypointArray, OVB, OVBBatch
+from typing import List, Optional, Sequence, Union
 import math
-from app.utils.bezier import bezier_sample
+import numpy as np
+from app.utils.bezier import bezier_sample_batch
 from app.models import Conflict
+from app.conflict_detector import all_pairs, boxes_overlap_2d, conflicts_from_pairs
 
 
 # app/trajectory_model.py
 
+# Curved legs for use_bezier: control point offset (m) and samples per leg
+BEZIER_OFFSET = 30.0
+BEZIER_POINTS = 5
+
 def compute_heading(dx, dy):
     return math.atan2(dy, dx)
 
-def generate_ovbs(drone_id: str, waypoints: List[Waypoint], width: float = 20.0, height: float = 20.0, use_bezier: bool = False) -> List[OVB]:
-    ovbs = []
-    
-    # Step 1: Apply Bezier sampling if enabled
+def generate_ovbs(drone_id: str, waypoints: List[Waypoint], width: float = 20.0, height: float = 20.0, use_bezier: bool = False,
+                  max_length: Optional[float] = None, max_duration: Optional[float] = None,
+                  merge_heading_tol: Optional[float] = None) -> List[OVB]:
+    batch = generate_ovbs_batch(
+        waypoints_to_array(waypoints), drone_id, width=width, height=height, use_bezier=use_bezier,
+        max_length=max_length, max_duration=max_duration, merge_heading_tol=merge_heading_tol
+    )
+    return batch.to_ovbs()
+
+
+def waypoints_to_array(waypoints: List[Waypoint]) -> np.ndarray:
+    if isinstance(waypoints, WaypointArray):
+        return waypoints.array  # a Mission's rows, read-only here
+    return np.array([(wp.x, wp.y, wp.z, wp.t) for wp in waypoints], dtype=np.float64).reshape(-1, 4)
+
+
+def generate_ovbs_batch(waypoints: np.ndarray, drone_ids: Union[str, Sequence[str]] = "",
+                        drone_index: Optional[np.ndarray] = None,
+                        width: float = 20.0, height: float = 20.0, use_bezier: bool = False,
+                        max_length: Optional[float] = None, max_duration: Optional[float] = None,
+                        merge_heading_tol: Optional[float] = None) -> OVBBatch:
+    """
+    Vectorized generate_ovbs over an (N, 4) array of (x, y, z, t) rows.
+
+    A whole fleet can be built in one pass by stacking the drones' rows and
+    passing `drone_index` (the drone of each row, rows of one drone
+    contiguous); segments that span two drones are dropped along with the
+    zero-length and non-increasing-time ones.
+
+    With `use_bezier`, every leg is first replaced by BEZIER_POINTS - 1
+    samples of its curve (app/utils/bezier.py), all legs in one pass.
+
+    Adaptive segmentation: consecutive segments turning less than
+    `merge_heading_tol` radians are fused first, then legs are split so no
+    box is longer than `max_length` metres or spans more than
+    `max_duration` seconds.
+    """
+    if isinstance(drone_ids, str):
+        drone_ids = [drone_ids]
+    wps = np.asarray(waypoints, dtype=np.float64).reshape(-1, 4)
+    if drone_index is None:
+        drone_index = np.zeros(len(wps), dtype=np.int64)
+    drone_index = np.asarray(drone_index, dtype=np.int64)
     if use_bezier:
-        new_wps = [waypoints[0]]
-        for i in range(len(waypoints) - 1):
-            curve = bezier_sample(waypoints[i], waypoints[i+1], control_offset=30, num_points=5)
-            new_wps.extend(curve)
-        waypoints = new_wps
-
-    # Step 2: Build OVBs from updated waypoints
-    for i in range(len(waypoints) - 1):
-        wp1, wp2 = waypoints[i], waypoints[i+1]
-        dx, dy = wp2.x - wp1.x, wp2.y - wp1.y
-        length = math.hypot(dx, dy)
-        dt = wp2.t - wp1.t
-        if dt <= 0 or length == 0:
-            continue  # skip bad segments
-        speed = length / dt
-        heading = math.atan2(dy, dx)
-
-        # OVB center
-        x_c = (wp1.x + wp2.x) / 2
-        y_c = (wp1.y + wp2.y) / 2
-        z_c = (wp1.z + wp2.z) / 2
-        t_start = min(wp1.t, wp2.t)
-        t_end = max(wp1.t, wp2.t)
-
-        ovb = OVB(
-            drone_id=drone_id,
-            center=(x_c, y_c, z_c),
-            length=length,
-            width=width,
-            height=height,
-            heading=heading,
-            speed=speed,
-            entry_time=t_start,
-            exit_time=t_end
-        )
-        ovbs.append(ovb)
-
-    return ovbs
+        wps, drone_index = bezier_sample_batch(wps, drone_index, BEZIER_OFFSET, BEZIER_POINTS)
+    if merge_heading_tol is not None:
+        wps, drone_index = merge_collinear(wps, drone_index, merge_heading_tol, width, height)
+    if max_length is not None or max_duration is not None:
+        wps, drone_index = split_segments(wps, drone_index, max_length, max_duration)
+    if len(wps) < 2:
+        return OVBBatch.empty(drone_ids)
+
+    p1, p2 = wps[:-1], wps[1:]
+    dx = p2[:, 0] - p1[:, 0]
+    dy = p2[:, 1] - p1[:, 1]
+    dt = p2[:, 3] - p1[:, 3]
+    length = np.hypot(dx, dy)
+
+    keep = (dt > 0) & (length != 0) & (drone_index[:-1] == drone_index[1:])  # skip bad segments
+    p1, p2 = p1[keep], p2[keep]
+    dx, dy, dt, length = dx[keep], dy[keep], dt[keep], length[keep]
+    n = len(length)
+
+    return OVBBatch(
+        drone_ids=list(drone_ids),
+        drone_index=drone_index[:-1][keep],
+        centers=(p1[:, :3] + p2[:, :3]) / 2,
+        length=length,
+        width=np.full(n, float(width)),
+        height=np.full(n, float(height)),
+        heading=np.arctan2(dy, dx),
+        speed=length / dt,
+        entry_time=np.minimum(p1[:, 3], p2[:, 3]),
+        exit_time=np.maximum(p1[:, 3], p2[:, 3])
+    )
+
+
+def _valid_segments(wps: np.ndarray, drone_index: np.ndarray) -> np.ndarray:
+    length = np.hypot(wps[1:, 0] - wps[:-1, 0], wps[1:, 1] - wps[:-1, 1])
+    dt = wps[1:, 3] - wps[:-1, 3]
+    return (dt > 0) & (length != 0) & (drone_index[:-1] == drone_index[1:])
+
+
+def merge_collinear(wps: np.ndarray, drone_index: np.ndarray, heading_tol: float,
+                    width: float = 20.0, height: float = 20.0):
+    """
+    Drops interior waypoints while the path keeps within `heading_tol` of the
+    heading of the run's first segment, so slow curves are not flattened
+    into one chord. A waypoint is also kept when dropping it would leave a
+    waypoint of the run outside the chord's box: more than height / 2 off
+    the chord's altitude at its time, or more than width / 2 off the chord
+    laterally. Returns the reduced (waypoints, drone_index).
+    """
+    if len(wps) < 3:
+        return wps, drone_index
+    valid = _valid_segments(wps, drone_index).tolist()
+    headings = np.arctan2(wps[1:, 1] - wps[:-1, 1], wps[1:, 0] - wps[:-1, 0]).tolist()
+
+    keep = [0]
+    anchor = 0  # first segment of the current run
+    for k in range(1, len(wps) - 1):
+        turn = (headings[k] - headings[anchor] + math.pi) % (2 * math.pi) - math.pi
+        if (valid[anchor] and valid[k] and abs(turn) < heading_tol
+                and _inside_chord(wps[anchor:k + 2], width, height)):
+            continue  # waypoint k lies on the current run
+        keep.append(k)
+        anchor = k
+    keep.append(len(wps) - 1)
+    return wps[keep], drone_index[keep]
+
+
+def _inside_chord(run: np.ndarray, width: float, height: float) -> bool:
+    """Whether the interior rows of `run` stay in the box of its end-to-end chord."""
+    start, end = run[0], run[-1]
+    inner = run[1:-1]
+    d = end - start
+    frac = (inner[:, 3] - start[3]) / d[3]
+    if np.any(np.abs(inner[:, 2] - (start[2] + frac * d[2])) > height / 2):
+        return False
+    lateral = np.abs(d[0] * (inner[:, 1] - start[1]) - d[1] * (inner[:, 0] - start[0])) / math.hypot(d[0], d[1])
+    return not np.any(lateral > width / 2)
+
+
+def split_segments(wps: np.ndarray, drone_index: np.ndarray,
+                   max_length: Optional[float] = None, max_duration: Optional[float] = None):
+    """
+    Splits every segment into equal pieces no longer than `max_length` and no
+    longer-lived than `max_duration`, by linear interpolation of x, y, z, t.
+    """
+    if len(wps) < 2:
+        return wps, drone_index
+    d = wps[1:] - wps[:-1]
+    pieces = np.ones(len(d), dtype=np.int64)
+    if max_length is not None:
+        pieces = np.maximum(pieces, np.ceil(np.hypot(d[:, 0], d[:, 1]) / max_length).astype(np.int64))
+    if max_duration is not None:
+        pieces = np.maximum(pieces, np.ceil(d[:, 3] / max_duration).astype(np.int64))
+    pieces[~_valid_segments(wps, drone_index)] = 1
+
+    seg = np.repeat(np.arange(len(d)), pieces)
+    step = np.arange(len(seg)) - np.repeat(np.cumsum(pieces) - pieces, pieces)
+    frac = (step / pieces[seg])[:, None]
+    out = np.vstack([wps[seg] + frac * d[seg], wps[-1:]])
+    return out, np.concatenate([drone_index[seg], drone_index[-1:]])
+
+
+def box_volumes(batch: OVBBatch):
+    """(sum of box volumes, sum of their axis-aligned hull volumes)."""
+    c, s = np.abs(np.cos(batch.heading)), np.abs(np.sin(batch.heading))
+    hull_area = (c * batch.length + s * batch.width) * (s * batch.length + c * batch.width)
+    return (
+        float(np.sum(batch.length * batch.width * batch.height)),
+        float(np.sum(hull_area * batch.height))
+    )
+
+
+def segmentation_report(drone_id: str, waypoints: List[Waypoint], width: float = 20.0,
+                        height: float = 20.0, use_bezier: bool = False, **segmentation) -> dict:
+    """
+    Box count and swept volume with and without adaptive segmentation;
+    `segmentation` takes the max_length / max_duration / merge_heading_tol
+    keywords of generate_ovbs.
+    """
+    before = generate_ovbs(drone_id, waypoints, width, height, use_bezier)
+    after = generate_ovbs(drone_id, waypoints, width, height, use_bezier, **segmentation)
+    volume_before, hull_before = box_volumes(OVBBatch.from_ovbs(before))
+    volume_after, hull_after = box_volumes(OVBBatch.from_ovbs(after))
+    return {
+        "boxes_before": len(before),
+        "boxes_after": len(after),
+        "volume_before": volume_before,
+        "volume_after": volume_after,
+        "hull_volume_before": hull_before,
+        "hull_volume_after": hull_after
+    }
 
 
 def overlap_2d(a: OVB, b: OVB) -> bool:
-    ax, ay = a.center[0], a.center[1]
-    bx, by = b.center[0], b.center[1]
-    return abs(ax - bx) <= (a.length + b.length)/2 and abs(ay - by) <= (a.width + b.width)/2
+    return boxes_overlap_2d(a, b)
 
 def overlap_z(a: OVB, b: OVB) -> bool:
     az, bz = a.center[2], b.center[2]
@@ -74,27 +210,7 @@ def detect_conflicts(ovbs_a: List[OVB], ovbs_b: List[OVB]) -> List[Conflict]:
     Detect spatial and temporal conflicts between two OVB lists.
     Returns list of Conflict objects.
     """
-    conflicts = []
-    for a in ovbs_a:
-        for b in ovbs_b:
-            if overlap_2d(a, b) and overlap_z(a, b) and overlap_time(a, b):
-                t_a = (a.entry_time + a.exit_time) / 2
-                t_b = (b.entry_time + b.exit_time) / 2
-                dt_actual = abs(t_a - t_b)
-                dt_required = 2 * b.length / b.speed
-                if dt_actual < dt_required:
-                    severity = (dt_required - dt_actual) / dt_required
-                    conflicts.append(Conflict(
-                        location=((a.center[0] + b.center[0])/2,
-                                  (a.center[1] + b.center[1])/2,
-                                  (a.center[2] + b.center[2])/2),
-                        time_a=t_a,
-                        time_b=t_b,
-                        time=(t_a + t_b) / 2,               # ✅ midpoint time
-                        actual_gap=dt_actual,
-                        required_gap=dt_required,
-                        with_id=b.drone_id,
-                        severity=severity
-                    ))
-    return conflicts
-    
\ No newline at end of file
+    batch_a = OVBBatch.from_ovbs(ovbs_a)
+    batch_b = OVBBatch.from_ovbs(ovbs_b)
+    ia, ib = all_pairs(len(batch_a), len(batch_b))
+    return conflicts_from_pairs(batch_a, batch_b, ia, ib)
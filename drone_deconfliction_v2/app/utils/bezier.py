@@ -1,12 +1,42 @@
 # app/utils/bezier.py
 
 from app.models import Waypoint
-from typing import List
+from app.utils.lru import LRUCache
+from typing import List, Optional, Tuple
+import hashlib
 import numpy as np
 
+# Sampled (x, y, z) of recently seen routes. Times are not part of the key,
+# so a resubmitted route, or one shifted by a delay, reuses its curve.
+curve_cache = LRUCache(16 << 20)
+
+
 def bezier_curve(p0, p1, p2, t):
     return (1 - t)**2 * p0 + 2 * (1 - t) * t * p1 + t**2 * p2
 
+def bezier_points(p1: np.ndarray, p2: np.ndarray, u: np.ndarray, control_offset: float = 30.0) -> np.ndarray:
+    """
+    Points at parameter `u` on the quadratic Bezier leg from each row of `p1`
+    to the same row of `p2` (rows are x, y, z, t). The control point sits
+    `control_offset` to the left of the leg's midpoint; a leg with no
+    horizontal extent has no left, so it stays straight.
+    """
+    dx, dy = p2[:, 0] - p1[:, 0], p2[:, 1] - p1[:, 1]
+    length = np.hypot(dx, dy)
+    safe = np.where(length > 0, length, 1.0)
+    perp_x = np.where(length > 0, -dy / safe, 0.0)
+    perp_y = np.where(length > 0, dx / safe, 0.0)
+
+    ctrl = (p1[:, :3] + p2[:, :3]) / 2
+    ctrl[:, 0] += perp_x * control_offset
+    ctrl[:, 1] += perp_y * control_offset
+
+    u = u[:, None]
+    out = np.empty((len(u), 4))
+    out[:, :3] = bezier_curve(p1[:, :3], ctrl, p2[:, :3], u)
+    out[:, 3] = ((1 - u) * p1[:, 3:] + u * p2[:, 3:])[:, 0]
+    return out
+
 def bezier_sample(wp1: Waypoint, wp2: Waypoint, control_offset: float = 30.0, num_points: int = 10) -> List[Waypoint]:
     """
     Generate intermediate waypoints between wp1 and wp2 using a quadratic Bezier curve.
@@ -16,8 +46,8 @@ def bezier_sample(wp1: Waypoint, wp2: Waypoint, control_offset: float = 30.0, nu
     dx, dy = wp2.x - wp1.x, wp2.y - wp1.y
     length = np.hypot(dx, dy)
 
-    # Unit perpendicular direction (left turn)
-    perp_x, perp_y = -dy / length, dx / length
+    # Unit perpendicular direction (left turn); a vertical or hovering leg stays straight
+    perp_x, perp_y = (-dy / length, dx / length) if length > 0 else (0.0, 0.0)
 
     # Control point is offset perpendicular to segment
     ctrl_x = (wp1.x + wp2.x) / 2 + perp_x * control_offset
@@ -34,3 +64,52 @@ def bezier_sample(wp1: Waypoint, wp2: Waypoint, control_offset: float = 30.0, nu
         bezier_points.append(Waypoint(x=x, y=y, z=z, t=t_time))
 
     return bezier_points
+
+def bezier_sample_batch(waypoints: np.ndarray, drone_index: Optional[np.ndarray] = None,
+                        control_offset: float = 30.0, num_points: int = 10,
+                        cache: Optional[LRUCache] = curve_cache) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Vectorized bezier_sample over every leg of an (N, 4) array of (x, y, z, t)
+    rows, for one drone or a whole fleet (`drone_index` as in
+    generate_ovbs_batch). Each drone keeps its first waypoint, then each of
+    its legs contributes the num_points - 1 interior samples, as
+    generate_ovbs(use_bezier=True) always built them. All samples are one
+    evaluation over a (legs x samples) parameter grid.
+
+    Returns (waypoints, drone_index) ready for generate_ovbs_batch.
+    """
+    wps = np.asarray(waypoints, dtype=np.float64).reshape(-1, 4)
+    if drone_index is None:
+        drone_index = np.zeros(len(wps), dtype=np.int64)
+    drone_index = np.asarray(drone_index, dtype=np.int64)
+    if len(wps) == 0:
+        return wps, drone_index
+
+    key = None
+    if cache is not None:
+        digest = hashlib.blake2b(np.ascontiguousarray(wps[:, :3]).tobytes(), digest_size=16)
+        digest.update(drone_index.tobytes())
+        key = (digest.hexdigest(), float(control_offset), int(num_points))
+        hit = cache.get(key)
+        if hit is not None:
+            seg, u, xyz = hit
+            out = np.empty((len(seg), 4))
+            out[:, :3] = xyz
+            out[:, 3] = (1 - u) * wps[seg, 3] + u * wps[np.minimum(seg + 1, len(wps) - 1), 3]
+            return out, drone_index[seg]
+
+    # Row k emits itself if it starts a drone (u = 0) and the interior
+    # samples of leg k -> k+1 if that leg stays within the drone
+    is_start = np.concatenate([[True], drone_index[1:] != drone_index[:-1]])
+    is_leg = np.append(~is_start[1:], False)
+    counts = is_start + (num_points - 1) * is_leg
+    seg = np.repeat(np.arange(len(wps)), counts)
+    local = np.arange(len(seg)) - np.repeat(np.cumsum(counts) - counts, counts)
+    u = (local + 1 - is_start[seg]) / num_points
+
+    rows = np.arange(len(wps))
+    nxt = np.where(is_leg, rows + 1, rows)
+    out = bezier_points(wps[seg], wps[nxt[seg]], u, control_offset)
+    if key is not None:
+        cache.put(key, (seg, u, out[:, :3].copy()))
+    return out, drone_index[seg]
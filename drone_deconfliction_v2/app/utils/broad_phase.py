@@ -0,0 +1,420 @@
+# app/utils/broad_phase.py
+
+from abc import ABC, abstractmethod
+from typing import Dict, List, Sequence, Set, Tuple, Union
+import numpy as np
+from app.models import OVB, OVBBatch
+from app.utils.spatial_index import make_index, ovb_bounds, spatial_query
+
+
+def bounds_array(ovbs: Union[Sequence[OVB], OVBBatch], z_buffer: float = 0.0, t_buffer: float = 0.0) -> np.ndarray:
+    """(n, 8) array of 4D bounds, row-for-row what ovb_bounds(ovb, 4) returns."""
+    batch = ovbs if isinstance(ovbs, OVBBatch) else OVBBatch.from_ovbs(ovbs)
+    c, s = np.abs(np.cos(batch.heading)), np.abs(np.sin(batch.heading))
+    dx = c * batch.length / 2 + s * batch.width / 2
+    dy = s * batch.length / 2 + c * batch.width / 2
+    dz = batch.height / 2 + z_buffer
+    x, y, z = batch.centers[:, 0], batch.centers[:, 1], batch.centers[:, 2]
+    return np.column_stack([
+        x - dx, y - dy, z - dz, batch.entry_time - t_buffer,
+        x + dx, y + dy, z + dz, batch.exit_time + t_buffer
+    ])
+
+
+def _expand(starts: np.ndarray, counts: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """(owner, position) for every element of the ranges starts[i]:starts[i]+counts[i]."""
+    owner = np.repeat(np.arange(len(counts)), counts)
+    offset = np.arange(len(owner)) - np.repeat(np.cumsum(counts) - counts, counts)
+    return owner, starts[owner] + offset
+
+
+def _overlapping(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Row-wise 4D box intersection test between two (n, 8) bound arrays."""
+    return np.all((a[:, :4] <= b[:, 4:]) & (b[:, :4] <= a[:, 4:]), axis=1)
+
+
+def sweep_pairs(queries: np.ndarray, stored: np.ndarray,
+                max_candidates: int = 1 << 21) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    (query row, stored row) of every intersecting pair of two (n, 8) bound
+    arrays: one sort of `stored` by entry time, then a searchsorted window
+    per query and an exact bounds test. Queries are processed in blocks of at
+    most `max_candidates` window entries to bound peak memory.
+    """
+    if not len(queries) or not len(stored):
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    order = np.argsort(stored[:, 3], kind="stable")
+    entries = stored[order, 3]
+    longest = float(np.max(stored[:, 7] - stored[:, 3]))
+    lo = np.searchsorted(entries, queries[:, 3] - longest, side="left")
+    hi = np.searchsorted(entries, queries[:, 7], side="right")
+
+    counts = hi - lo
+    block = np.cumsum(counts) // max_candidates
+    cuts = np.flatnonzero(np.diff(block)) + 1
+    rows_out, cols_out = [], []
+    for start, stop in zip(np.r_[0, cuts], np.r_[cuts, len(queries)]):
+        rows, pos = _expand(lo[start:stop], counts[start:stop])
+        rows += start
+        cols = order[pos]
+        hit = _overlapping(queries[rows], stored[cols])
+        rows_out.append(rows[hit])
+        cols_out.append(cols[hit])
+    return np.concatenate(rows_out), np.concatenate(cols_out)
+
+
+class BroadPhase(ABC):
+    """
+    Candidate-pair generator over keyed OVBs. Every backend returns the
+    stored boxes whose bounds intersect the query's bounds widened by
+    z_buffer / t_buffer; the narrow phase does the exact test.
+    """
+
+    name = ""
+
+    def __init__(self):
+        self.ovbs: Dict[int, OVB] = {}
+
+    def __len__(self) -> int:
+        return len(self.ovbs)
+
+    def build(self, ovbs: Sequence[OVB]) -> Dict[int, OVB]:
+        """Replaces the contents with `ovbs` keyed 0..n-1; returns the key map."""
+        self.load(dict(enumerate(ovbs)))
+        return dict(self.ovbs)
+
+    def load(self, keyed: Dict[int, OVB]):
+        """Replaces the contents with `keyed`, keeping its keys."""
+        self.clear()
+        for key, ovb in keyed.items():
+            self.insert(key, ovb)
+
+    @abstractmethod
+    def clear(self):
+        ...
+
+    @abstractmethod
+    def insert(self, key: int, ovb: OVB):
+        ...
+
+    @abstractmethod
+    def remove(self, key: int):
+        ...
+
+    @abstractmethod
+    def query_pairs(self, ovbs: Sequence[OVB], z_buffer: float = 0.0,
+                    t_buffer: float = 0.0) -> Tuple[np.ndarray, np.ndarray]:
+        """(query row, stored key) arrays of every candidate pair."""
+
+    def query(self, ovb: OVB, z_buffer: float = 0.0, t_buffer: float = 0.0) -> List[int]:
+        return self.query_pairs([ovb], z_buffer, t_buffer)[1].tolist()
+
+
+class RTreeBroadPhase(BroadPhase):
+    """libspatialindex R-tree; cheap incremental updates, per-query overhead."""
+
+    name = "rtree"
+
+    def __init__(self, dimension: int = 4):
+        super().__init__()
+        self.dimension = dimension
+        self.index = make_index(dimension)
+
+    def clear(self):
+        self.index = make_index(self.dimension)
+        self.ovbs = {}
+
+    def load(self, keyed: Dict[int, OVB]):
+        # Bulk load is much faster than one insert per box
+        self.ovbs = dict(keyed)
+        stream = ((key, ovb_bounds(ovb, self.dimension), None) for key, ovb in self.ovbs.items())
+        self.index = make_index(self.dimension, stream if self.ovbs else None)
+
+    def insert(self, key: int, ovb: OVB):
+        self.index.insert(key, ovb_bounds(ovb, self.dimension))
+        self.ovbs[key] = ovb
+
+    def remove(self, key: int):
+        self.index.delete(key, ovb_bounds(self.ovbs.pop(key), self.dimension))
+
+    def query(self, ovb: OVB, z_buffer: float = 0.0, t_buffer: float = 0.0) -> List[int]:
+        return spatial_query(ovb, self.index, z_buffer, t_buffer)
+
+    def query_pairs(self, ovbs: Sequence[OVB], z_buffer: float = 0.0,
+                    t_buffer: float = 0.0) -> Tuple[np.ndarray, np.ndarray]:
+        rows, keys = [], []
+        for i, ovb in enumerate(ovbs):
+            hits = self.query(ovb, z_buffer, t_buffer)
+            rows.extend([i] * len(hits))
+            keys.extend(hits)
+        return np.array(rows, dtype=np.int64), np.array(keys, dtype=np.int64)
+
+
+class _ArrayBroadPhase(BroadPhase):
+    """
+    Boxes kept as rows of a NumPy bounds array. Removal only clears the row's
+    alive flag; the search structure is rebuilt lazily on the next query, so
+    these backends suit build-once / query-many workloads best.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.clear()
+
+    def clear(self):
+        self.ovbs = {}
+        self._bounds = np.empty((0, 8))
+        self._keys = np.empty(0, dtype=np.int64)
+        self._alive = np.empty(0, dtype=bool)
+        self._slot: Dict[int, int] = {}
+        self._pending: List[Tuple[int, OVB]] = []
+        self._table = None
+
+    def load(self, keyed: Dict[int, OVB]):
+        self.clear()
+        self.ovbs = dict(keyed)
+        self._bounds = bounds_array(list(self.ovbs.values())).reshape(-1, 8)
+        self._keys = np.fromiter(self.ovbs, dtype=np.int64, count=len(self.ovbs))
+        self._alive = np.ones(len(self.ovbs), dtype=bool)
+        self._slot = {key: slot for slot, key in enumerate(self.ovbs)}
+
+    def insert(self, key: int, ovb: OVB):
+        if key in self.ovbs:
+            self.remove(key)
+        self.ovbs[key] = ovb
+        self._pending.append((key, ovb))
+        self._table = None
+
+    def remove(self, key: int):
+        self.ovbs.pop(key)
+        slot = self._slot.pop(key, None)
+        if slot is None:
+            self._pending = [(k, o) for k, o in self._pending if k != key]
+        else:
+            self._alive[slot] = False
+        self._table = None
+
+    def flush(self):
+        """Applies pending inserts now, so their bounds are not built by the next query."""
+        self._flush()
+
+    def _flush(self):
+        """Appends pending inserts and drops dead rows once they dominate."""
+        if self._pending:
+            keys = np.array([k for k, _ in self._pending], dtype=np.int64)
+            start = len(self._keys)
+            self._bounds = np.vstack([self._bounds, bounds_array([o for _, o in self._pending])])
+            self._keys = np.concatenate([self._keys, keys])
+            self._alive = np.concatenate([self._alive, np.ones(len(keys), dtype=bool)])
+            self._slot.update({k: start + i for i, k in enumerate(keys.tolist())})
+            self._pending = []
+        if len(self._alive) and np.count_nonzero(~self._alive) > len(self._alive) // 2:
+            keep = np.flatnonzero(self._alive)
+            self._bounds, self._keys = self._bounds[keep], self._keys[keep]
+            self._alive = np.ones(len(keep), dtype=bool)
+            self._slot = {k: i for i, k in enumerate(self._keys.tolist())}
+
+    def query_pairs(self, ovbs: Sequence[OVB], z_buffer: float = 0.0,
+                    t_buffer: float = 0.0) -> Tuple[np.ndarray, np.ndarray]:
+        if self._table is None:
+            self._flush()
+            self._table = self._build_table()
+        queries = bounds_array(ovbs, z_buffer, t_buffer).reshape(-1, 8)
+        rows, slots = self._candidates(queries)
+        hit = self._alive[slots] & _overlapping(queries[rows], self._bounds[slots])
+        return rows[hit], self._keys[slots[hit]]
+
+    @abstractmethod
+    def _build_table(self):
+        ...
+
+    @abstractmethod
+    def _candidates(self, queries: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Unique (query row, slot) pairs that may overlap."""
+
+
+class HashGridBroadPhase(_ArrayBroadPhase):
+    """
+    Uniform (x, y, z) hash grid. Each box is registered in every cell its
+    bounds cover; queries join their own cells against the sorted cell table.
+    Fast when boxes are small and similar in size relative to `cell_size`.
+    """
+
+    name = "grid"
+
+    def __init__(self, cell_size: float = 50.0):
+        self.cell_size = cell_size
+        super().__init__()
+
+    def _cells(self, bounds: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(cell hash, box row, cell coordinates) for every cell touched by every box."""
+        lo = np.floor(bounds[:, :3] / self.cell_size).astype(np.int64)
+        span = np.floor(bounds[:, 4:7] / self.cell_size).astype(np.int64) - lo + 1
+        owner, local = _expand(np.zeros(len(bounds), dtype=np.int64), np.prod(span, axis=1))
+        sx, sy = span[owner, 0], span[owner, 1]
+        cell = np.column_stack([
+            lo[owner, 0] + local % sx,
+            lo[owner, 1] + (local // sx) % sy,
+            lo[owner, 2] + local // (sx * sy)
+        ])
+        # Collisions only add candidates; the exact bounds test removes them
+        hashed = (cell[:, 0] * 73856093) ^ (cell[:, 1] * 19349663) ^ (cell[:, 2] * 83492791)
+        return hashed, owner, cell
+
+    def _build_table(self):
+        alive = np.flatnonzero(self._alive)
+        cells, owner, _ = self._cells(self._bounds[alive])
+        # Two cells of one box may share a hash; keep each box once per bucket
+        table = np.unique(np.column_stack([cells, alive[owner]]), axis=0)
+        return table[:, 0], table[:, 1]
+
+    def _candidates(self, queries):
+        cells, slots = self._table
+        q_cells, q_rows, q_coords = self._cells(queries)
+        lo = np.searchsorted(cells, q_cells, side="left")
+        hi = np.searchsorted(cells, q_cells, side="right")
+        owner, pos = _expand(lo, hi - lo)
+        rows, found = q_rows[owner], slots[pos]
+        # Overlapping boxes share the cell holding their intersection's min
+        # corner; reporting the pair only from that cell keeps it unique
+        corner = np.maximum(queries[rows, :3], self._bounds[found, :3])
+        home = np.all(np.floor(corner / self.cell_size).astype(np.int64) == q_coords[owner], axis=1)
+        return rows[home], found[home]
+
+
+class SweepAndPruneBroadPhase(_ArrayBroadPhase):
+    """
+    Sort-based sweep over entry_time/exit_time: boxes are sorted by entry
+    time and each query takes the contiguous run that can still be airborne
+    during its window, then the spatial bounds prune the run.
+    """
+
+    name = "sap"
+
+    def _build_table(self):
+        alive = np.flatnonzero(self._alive)
+        order = alive[np.argsort(self._bounds[alive, 3], kind="stable")]
+        entries = self._bounds[order, 3]
+        longest = float(np.max(self._bounds[order, 7] - entries)) if len(order) else 0.0
+        return entries, order, longest
+
+    def _candidates(self, queries):
+        entries, order, longest = self._table
+        lo = np.searchsorted(entries, queries[:, 3] - longest, side="left")
+        hi = np.searchsorted(entries, queries[:, 7], side="right")
+        rows, pos = _expand(lo, hi - lo)
+        return rows, order[pos]
+
+
+class EnvelopeBroadPhase(BroadPhase):
+    """
+    Two-level index: a small R-tree of one (x, y, z, t) envelope per
+    mission, and each mission's box bounds as an array. A query first takes
+    the missions whose envelope meets the envelope of all query boxes, then
+    sweeps only those missions' boxes, so its cost follows the number of
+    nearby missions rather than the total number of boxes.
+    """
+
+    name = "envelope"
+
+    def __init__(self):
+        super().__init__()
+        self.clear()
+
+    def clear(self):
+        self.ovbs = {}
+        self.index = make_index(4)
+        self._codes: Dict[str, int] = {}
+        self._boxes: Dict[int, Dict[int, np.ndarray]] = {}   # mission code -> key -> bounds
+        self._envelopes: Dict[int, Tuple[float, ...]] = {}
+        self._arrays: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+        self._dirty: Set[int] = set()
+
+    def load(self, keyed: Dict[int, OVB]):
+        self.clear()
+        self.ovbs = dict(keyed)
+        bounds = bounds_array(list(self.ovbs.values())).reshape(-1, 8)
+        for (key, ovb), row in zip(self.ovbs.items(), bounds):
+            code = self._codes.setdefault(ovb.drone_id, len(self._codes))
+            self._boxes.setdefault(code, {})[key] = row
+        self._dirty = set(self._boxes)
+        self._refresh()
+
+    def _envelope(self, code: int) -> Tuple[float, ...]:
+        rows = np.array(list(self._boxes[code].values()))
+        return tuple(rows[:, :4].min(axis=0).tolist() + rows[:, 4:].max(axis=0).tolist())
+
+    def _refresh(self):
+        """Re-indexes the envelopes of missions changed since the last query."""
+        # Many changes (e.g. a fleet registered box by box): bulk-load instead
+        reload = len(self._dirty) > len(self._envelopes) // 20
+        for code in self._dirty:
+            if code in self._envelopes:
+                old = self._envelopes.pop(code)
+                if not reload:
+                    self.index.delete(code, old)
+            if self._boxes.get(code):
+                self._envelopes[code] = self._envelope(code)
+                if not reload:
+                    self.index.insert(code, self._envelopes[code])
+            else:
+                self._boxes.pop(code, None)
+        self._dirty = set()
+        if reload:
+            stream = ((code, env, None) for code, env in self._envelopes.items())
+            self.index = make_index(4, stream if self._envelopes else None)
+
+    def insert(self, key: int, ovb: OVB):
+        if key in self.ovbs:
+            self.remove(key)
+        code = self._codes.setdefault(ovb.drone_id, len(self._codes))
+        self.ovbs[key] = ovb
+        self._boxes.setdefault(code, {})[key] = np.array(ovb_bounds(ovb, 4))
+        self._arrays.pop(code, None)
+        self._dirty.add(code)
+
+    def remove(self, key: int):
+        code = self._codes[self.ovbs.pop(key).drone_id]
+        del self._boxes[code][key]
+        self._arrays.pop(code, None)
+        self._dirty.add(code)
+
+    def _mission_arrays(self, code: int) -> Tuple[np.ndarray, np.ndarray]:
+        """(keys, (n, 8) bounds) of one mission, cached until it changes."""
+        if code not in self._arrays:
+            boxes = self._boxes[code]
+            self._arrays[code] = (
+                np.fromiter(boxes, dtype=np.int64, count=len(boxes)),
+                np.array(list(boxes.values())).reshape(-1, 8)
+            )
+        return self._arrays[code]
+
+    def query_pairs(self, ovbs: Sequence[OVB], z_buffer: float = 0.0,
+                    t_buffer: float = 0.0) -> Tuple[np.ndarray, np.ndarray]:
+        self._refresh()
+        queries = bounds_array(ovbs, z_buffer, t_buffer).reshape(-1, 8)
+        if not len(queries) or not self._envelopes:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        envelope = tuple(queries[:, :4].min(axis=0).tolist() + queries[:, 4:].max(axis=0).tolist())
+        nearby = [self._mission_arrays(code) for code in self.index.intersection(envelope)]
+        if not nearby:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        keys = np.concatenate([k for k, _ in nearby])
+        rows, cols = sweep_pairs(queries, np.concatenate([b for _, b in nearby]))
+        return rows, keys[cols]
+
+
+BACKENDS = {
+    RTreeBroadPhase.name: RTreeBroadPhase,
+    HashGridBroadPhase.name: HashGridBroadPhase,
+    SweepAndPruneBroadPhase.name: SweepAndPruneBroadPhase,
+    EnvelopeBroadPhase.name: EnvelopeBroadPhase,
+}
+
+
+def make_broad_phase(backend: str = "rtree", **options) -> BroadPhase:
+    """Backend by name ("rtree", "grid", "sap" or "envelope"); options go to its constructor."""
+    try:
+        return BACKENDS[backend](**options)
+    except KeyError:
+        raise ValueError(f"Unknown broad-phase backend: {backend}") from None
@@ -0,0 +1,79 @@
+# app/utils/lru.py
+
+from collections import OrderedDict
+from typing import Any, Hashable, Tuple
+import threading
+import numpy as np
+from app.models import OVBBatch
+
+# Rough per-entry bookkeeping (key, OrderedDict node, small objects)
+ENTRY_OVERHEAD = 256
+
+
+def nbytes(value: Any) -> int:
+    """Approximate memory held by a cached OVBBatch / PairConflicts / array tuple."""
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, OVBBatch):
+        return sum(getattr(value, name).nbytes for name in ("drone_index", "centers") + OVBBatch.COLUMNS)
+    if isinstance(value, tuple):
+        return sum(nbytes(v) for v in value)
+    return 0
+
+
+class LRUCache:
+    """Thread-safe LRU bounded by approximate bytes, with hit/miss counters."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data: "OrderedDict[Hashable, Tuple[Any, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: Hashable, value: Any):
+        size = nbytes(value) + ENTRY_OVERHEAD
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self.bytes -= old[1]
+            if size > self.max_bytes:
+                return  # larger than the whole cache; don't flush everything for it
+            self._data[key] = (value, size)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, (_, dropped) = self._data.popitem(last=False)
+                self.bytes -= dropped
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.bytes = 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._data),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions
+        }
@@ -3,23 +3,53 @@
 from rtree import index
 from app.models import OVB
 from typing import List, Tuple, Dict
+import math
 
-def build_spatial_index(all_ovbs: List[OVB]) -> Tuple[index.Index, Dict[int, OVB]]:
-    idx = index.Index()
+def make_index(dimension: int = 4, stream=None) -> index.Index:
+    """
+    R-tree, empty or bulk-loaded from a (id, bounds, obj) stream. dimension=2
+    indexes (x, y) only; 3 adds altitude and 4 adds time, so boxes at other
+    levels or times never become candidates.
+    """
+    if dimension not in (2, 3, 4):
+        raise ValueError(f"Unsupported index dimension: {dimension}")
+    prop = index.Property()
+    prop.dimension = dimension
+    if stream is not None:
+        return index.Index(stream, properties=prop, interleaved=True)
+    return index.Index(properties=prop, interleaved=True)
+
+def ovb_bounds(ovb: OVB, dimension: int = 2, z_buffer: float = 0.0, t_buffer: float = 0.0) -> Tuple[float, ...]:
+    """
+    Interleaved (mins..., maxs...) bounds of an OVB, widened by the buffers.
+    The footprint is the axis-aligned hull of the box rotated to its heading.
+    """
+    x, y, z = ovb.center
+    c, s = abs(math.cos(ovb.heading)), abs(math.sin(ovb.heading))
+    dx = c * ovb.length / 2 + s * ovb.width / 2
+    dy = s * ovb.length / 2 + c * ovb.width / 2
+    mins = [x - dx, y - dy]
+    maxs = [x + dx, y + dy]
+    if dimension >= 3:
+        dz = ovb.height / 2 + z_buffer
+        mins.append(z - dz)
+        maxs.append(z + dz)
+    if dimension >= 4:
+        mins.append(ovb.entry_time - t_buffer)
+        maxs.append(ovb.exit_time + t_buffer)
+    return tuple(mins + maxs)
+
+def build_spatial_index(all_ovbs: List[OVB], dimension: int = 4) -> Tuple[index.Index, Dict[int, OVB]]:
+    idx = make_index(dimension)
     id_to_ovb = {}
 
     for i, ovb in enumerate(all_ovbs):
-        x, y, z = ovb.center
-        dx = ovb.length / 2
-        dy = ovb.width / 2
-        # Only use 2D bounds for R-tree
-        idx.insert(i, (x - dx, y - dy, x + dx, y + dy))
+        idx.insert(i, ovb_bounds(ovb, dimension))
         id_to_ovb[i] = ovb  # map id to actual object
 
     return idx, id_to_ovb
 
-def spatial_query(ovb: OVB, idx: index.Index) -> List[int]:
-    x, y, z = ovb.center
-    dx = ovb.length / 2
-    dy = ovb.width / 2
-    return list(idx.intersection((x - dx, y - dy, x + dx, y + dy)))
+def spatial_query(ovb: OVB, idx: index.Index, z_buffer: float = 0.0, t_buffer: float = 0.0) -> List[int]:
+    # Buffers only widen the query; stored boxes keep their exact extents
+    bounds = ovb_bounds(ovb, idx.properties.dimension, z_buffer, t_buffer)
+    return list(idx.intersection(bounds))
@@ -12,24 +12,19 @@ from .trajectory_model import generate_ovbs
 
 def draw_3d_box(ax, ovb: OVB, color='blue', alpha=0.15):
     x, y, z = ovb.center
-    dx = ovb.length
-    dy = ovb.width
-    dz = ovb.height
+    dx = ovb.length / 2
+    dy = ovb.width / 2
+    dz = ovb.height / 2
 
-    x -= dx / 2
-    y -= dy / 2
-    z -= dz / 2
+    # Footprint corners in the box frame, rotated to the heading
+    local = np.array([[-dx, -dy], [dx, -dy], [dx, dy], [-dx, dy]])
+    c, s = np.cos(ovb.heading), np.sin(ovb.heading)
+    footprint = local @ np.array([[c, s], [-s, c]]) + [x, y]
 
-    corners = np.array([
-        [x, y, z],
-        [x + dx, y, z],
-        [x + dx, y + dy, z],
-        [x, y + dy, z],
-        [x, y, z + dz],
-        [x + dx, y, z + dz],
-        [x + dx, y + dy, z + dz],
-        [x, y + dy, z + dz]
-    ])
+    corners = np.array(
+        [[px, py, z - dz] for px, py in footprint] +
+        [[px, py, z + dz] for px, py in footprint]
+    )
 
     faces = [
         [corners[i] for i in [0, 1, 2, 3]],  # bottom
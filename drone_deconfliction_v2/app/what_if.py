@@ -0,0 +1,89 @@
+# app/what_if.py
+
+from dataclasses import dataclass
+from typing import List, Optional, Sequence
+import numpy as np
+from app.conflict_detector import narrow_phase
+from app.models import OVBBatch
+from app.utils.broad_phase import bounds_array, sweep_pairs
+
+
+@dataclass
+class Variant:
+    delay: float
+    altitude_offset: float
+    conflict_count: int
+    max_severity: float
+    cost: float
+
+
+@dataclass
+class WhatIfResult:
+    variants: List[Variant]          # in grid order: delays outer, altitude offsets inner
+    best: Optional[Variant] = None   # cheapest conflict-free variant, if any
+
+
+def shifted_variants(primary: OVBBatch, delays: Sequence[float],
+                     altitude_offsets: Sequence[float]) -> OVBBatch:
+    """
+    Every (delay, altitude offset) copy of the primary's boxes stacked into
+    one batch; drone_index is the variant number. Boxes keep their shape
+    and speed, so shifting is a column add instead of a rebuild.
+    """
+    delays = np.asarray(delays, dtype=np.float64)
+    offsets = np.asarray(altitude_offsets, dtype=np.float64)
+    count = len(delays) * len(offsets)
+    n = len(primary)
+    dt = np.repeat(np.repeat(delays, len(offsets)), n)
+    dz = np.repeat(np.tile(offsets, len(delays)), n)
+    centers = np.tile(primary.centers, (count, 1))
+    centers[:, 2] += dz
+    columns = {name: np.tile(getattr(primary, name), count) for name in OVBBatch.COLUMNS}
+    columns["entry_time"] += dt
+    columns["exit_time"] += dt
+    return OVBBatch(
+        drone_ids=[f"variant_{v}" for v in range(count)],
+        drone_index=np.repeat(np.arange(count, dtype=np.int64), n),
+        centers=centers,
+        **columns
+    )
+
+
+def sweep_offsets(primary: OVBBatch, traffic: OVBBatch, delays: Sequence[float],
+                  altitude_offsets: Sequence[float] = (0.0,), delay_weight: float = 1.0,
+                  altitude_weight: float = 1.0, z_buffer: float = 0.0,
+                  t_buffer: float = 0.0) -> WhatIfResult:
+    """
+    Re-checks the primary under every combination of time delay and
+    altitude offset against `traffic` in one broad + narrow phase pass.
+    Unlike resolve_with_delay, which assumes the gap deficit shrinks
+    linearly with delay, each variant is a real conflict check, so a shift
+    into other traffic is caught. Cost is delay_weight * |delay| +
+    altitude_weight * |offset|; `best` is the cheapest variant with no
+    conflicts (ties: grid order).
+    """
+    variants = shifted_variants(primary, delays, altitude_offsets)
+    count = len(variants.drone_ids)
+    rows, cols = sweep_pairs(
+        bounds_array(variants, z_buffer, t_buffer).reshape(-1, 8),
+        bounds_array(traffic).reshape(-1, 8)
+    )
+    found = narrow_phase(variants, traffic, rows, cols)
+
+    owner = variants.drone_index[found.ia]
+    conflicts = np.bincount(owner, minlength=count)
+    severity = np.zeros(count)
+    np.maximum.at(severity, owner, found.severity)
+
+    grid_delays = np.repeat(np.asarray(delays, dtype=np.float64), len(altitude_offsets))
+    grid_offsets = np.tile(np.asarray(altitude_offsets, dtype=np.float64), len(delays))
+    cost = delay_weight * np.abs(grid_delays) + altitude_weight * np.abs(grid_offsets)
+
+    result = WhatIfResult(variants=[
+        Variant(float(d), float(z), int(c), float(s), float(k))
+        for d, z, c, s, k in zip(grid_delays, grid_offsets, conflicts, severity, cost)
+    ])
+    clear = np.flatnonzero(conflicts == 0)
+    if len(clear):
+        result.best = result.variants[int(clear[np.argmin(cost[clear])])]
+    return result
@@ -0,0 +1,66 @@
+# benchmarks/bench_bezier.py
+#
+# Bezier-sampled OVBs for 2,000 delivery routes: the per-leg bezier_sample
+# loop generate_ovbs used to run versus bezier_sample_batch over the whole
+# fleet, uncached and with the route curve cache warm (same routes delayed
+# by 30 s, as after a resolution pass).
+#
+#   cd drone_deconfliction_v2 && python -m benchmarks.bench_bezier
+
+import random
+import time
+import numpy as np
+from app.trajectory_model import BEZIER_OFFSET, BEZIER_POINTS, generate_ovbs_batch, waypoints_to_array
+from app.utils.bezier import bezier_sample, curve_cache
+from benchmarks.bench_broad_phase import delivery_route
+
+NUM_DRONES = 2000
+REPEATS = 5
+
+
+def per_leg(routes):
+    rows = []
+    for wps in routes:
+        sampled = [wps[0]]
+        for i in range(len(wps) - 1):
+            sampled.extend(bezier_sample(wps[i], wps[i + 1], BEZIER_OFFSET, BEZIER_POINTS))
+        rows.append(waypoints_to_array(sampled))
+    index = np.repeat(np.arange(len(rows)), [len(r) for r in rows])
+    return generate_ovbs_batch(np.concatenate(rows), [str(i) for i in range(len(rows))], index)
+
+
+def batched(stacked, index, ids):
+    return generate_ovbs_batch(stacked, ids, index, use_bezier=True)
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        batch = fn(*args)
+    return (time.perf_counter() - start) / REPEATS, batch
+
+
+if __name__ == "__main__":
+    random.seed(24)
+    routes = [delivery_route(num=20) for _ in range(NUM_DRONES)]
+    stacked = np.concatenate([waypoints_to_array(r) for r in routes])
+    index = np.repeat(np.arange(NUM_DRONES), 20)
+    ids = [str(i) for i in range(NUM_DRONES)]
+
+    loop_s, expected = timed(per_leg, routes)
+    curve_cache.clear()
+    start = time.perf_counter()
+    cold = batched(stacked, index, ids)
+    cold_s = time.perf_counter() - start
+    delayed = stacked.copy()
+    delayed[:, 3] += 30.0
+    warm_s, warm = timed(batched, delayed, index, ids)
+
+    assert np.array_equal(cold.centers, expected.centers)
+    assert np.allclose(warm.entry_time, expected.entry_time + 30.0)
+    legs = NUM_DRONES * 19
+    print(f"{NUM_DRONES} routes, {legs} legs, {len(expected)} OVBs")
+    print(f"{'sampler':>22} {'build (ms)':>11} {'us/leg':>8}")
+    for name, seconds in (("per-leg loop", loop_s), ("batch, cold cache", cold_s), ("batch, warm cache", warm_s)):
+        print(f"{name:>22} {seconds * 1e3:11.1f} {seconds * 1e6 / legs:8.2f}")
+    print(curve_cache.stats())
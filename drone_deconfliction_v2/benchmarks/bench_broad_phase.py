@@ -0,0 +1,65 @@
+# benchmarks/bench_broad_phase.py
+#
+# Build time, all-pairs query time and candidate count of each broad-phase
+# backend on dense urban delivery traffic: many short, similar boxes.
+#
+#   cd drone_deconfliction_v2 && python -m benchmarks.bench_broad_phase
+
+import math
+import random
+import time
+from app.models import Waypoint
+from app.trajectory_model import generate_ovbs
+from app.utils.broad_phase import make_broad_phase
+
+BACKENDS = [
+    ("rtree", {}),
+    ("grid", {"cell_size": 25.0}),
+    ("grid", {"cell_size": 50.0}),
+    ("grid", {"cell_size": 100.0}),
+    ("sap", {}),
+]
+
+
+def delivery_route(num=6):
+    """Short legs inside a 3 km city block grid, one altitude layer per direction."""
+    x, y, t = random.uniform(-1500, 1500), random.uniform(-1500, 1500), random.uniform(0, 1800)
+    z = random.choice([60.0, 80.0, 100.0, 120.0])
+    wps = [Waypoint(x, y, z, t)]
+    for _ in range(num - 1):
+        heading = random.choice([0.0, math.pi / 2, math.pi, -math.pi / 2]) + random.uniform(-0.1, 0.1)
+        leg = random.uniform(30, 60)
+        x, y = x + leg * math.cos(heading), y + leg * math.sin(heading)
+        t += leg / random.uniform(8, 12)
+        wps.append(Waypoint(x, y, z, t))
+    return wps
+
+
+def run(ovbs, backend, options):
+    bp = make_broad_phase(backend, **options)
+    start = time.perf_counter()
+    bp.build(ovbs)
+    built = time.perf_counter() - start
+
+    start = time.perf_counter()
+    rows, keys = bp.query_pairs(ovbs, z_buffer=5.0, t_buffer=2.0)
+    queried = time.perf_counter() - start
+
+    pairs = set(zip(rows.tolist(), keys.tolist()))
+    return built, queried, pairs
+
+
+if __name__ == "__main__":
+    random.seed(11)
+    ovbs = []
+    for i in range(5000):
+        ovbs.extend(generate_ovbs(f"Drone_{i}", delivery_route()))
+    print(f"{len(ovbs)} boxes\n")
+
+    print(f"{'backend':>18} {'build (s)':>10} {'query (s)':>10} {'pairs':>9} {'same pairs':>11}")
+    reference = None
+    for backend, options in BACKENDS:
+        built, queried, pairs = run(ovbs, backend, options)
+        reference = pairs if reference is None else reference
+        label = backend + "".join(f" {k}={v:g}" for k, v in options.items())
+        print(f"{label:>18} {built:10.3f} {queried:10.3f} {len(pairs):9d} {str(pairs == reference):>11}")
@@ -0,0 +1,56 @@
+# benchmarks/bench_columnar.py
+#
+# End-to-end /analyze time for 1,000 traffic drones x 20 waypoints sent as
+# JSON versus the columnar application/x-npz body. 50 of the drones shadow
+# the primary a few metres off and seconds behind, so both formats must
+# report the same, non-empty set of conflicts.
+#
+#   cd drone_deconfliction_v2 && python -m benchmarks.bench_columnar
+
+import json
+import random
+import time
+from fastapi.testclient import TestClient
+from app.api import app
+from app.columnar import MEDIA_TYPE, encode_analyze_request
+from benchmarks.bench_broad_phase import delivery_route
+
+
+def as_rows(route):
+    return [[wp.x, wp.y, wp.z, wp.t] for wp in route]
+
+
+def shadow(rows, dx, dt):
+    return [[x + dx, y + dx, z, t + dt] for x, y, z, t in rows]
+
+
+def conflict_set(res):
+    return sorted(json.dumps(c, sort_keys=True) for c in res.json()["conflicts"])
+
+
+if __name__ == "__main__":
+    random.seed(14)
+    mission = as_rows(delivery_route(20))
+    traffic = {f"SimDrone_{i}": as_rows(delivery_route(20)) for i in range(950)}
+    traffic.update({
+        f"Shadow_{i}": shadow(mission, random.uniform(-5, 5), random.uniform(0, 3)) for i in range(50)
+    })
+    client = TestClient(app)
+
+    payload = json.dumps({
+        "mission": {"waypoints": [dict(zip("xyzt", r)) for r in mission], "buffer": 20.0},
+        "simulated_drones": {d: [dict(zip("xyzt", r)) for r in rows] for d, rows in traffic.items()}
+    }).encode()
+    binary = encode_analyze_request(mission, traffic, buffer=20.0)
+
+    print(f"{'format':>8} {'body (kB)':>10} {'time (s)':>9} {'conflicts':>10}")
+    results = {}
+    for name, body, content_type in (("json", payload, "application/json"), ("npz", binary, MEDIA_TYPE)):
+        start = time.perf_counter()
+        res = client.post("/analyze?raw=true", content=body, headers={"content-type": content_type})
+        elapsed = time.perf_counter() - start
+        results[name] = conflict_set(res)
+        print(f"{name:>8} {len(body) / 1024:10.1f} {elapsed:9.3f} {len(results[name]):10d}")
+    assert results["json"], "no conflicts: the shadow drones should overlap the primary"
+    assert results["json"] == results["npz"], "JSON and npz bodies disagree"
+    print("JSON and npz conflicts match")
@@ -0,0 +1,43 @@
+# benchmarks/bench_envelope.py
+#
+# Per-mission queries (what /analyze and DroneAgent.check_conflict_against
+# issue) against a growing fleet: the box-level R-tree versus the two-level
+# mission-envelope index. Traffic spreads over a day, so most missions are
+# far away in time from any one query.
+#
+#   cd drone_deconfliction_v2 && python -m benchmarks.bench_envelope
+
+import random
+import time
+from app.airspace import AirspaceRegistry
+from app.trajectory_model import generate_ovbs
+from benchmarks.bench_horizon import route_at
+
+QUERIES = 200
+
+
+def per_query(registry, queries):
+    found = []
+    start = time.perf_counter()
+    for ovbs in queries:
+        rows, candidates = registry.query_pairs(ovbs)
+        found.append(sorted(zip(rows, map(id, candidates))))
+    return (time.perf_counter() - start) / len(queries) * 1e3, found
+
+
+if __name__ == "__main__":
+    print(f"{'missions':>9} {'boxes':>8} {'rtree (ms)':>11} {'envelope (ms)':>14} {'same pairs':>11}")
+    for n in (1000, 10000, 50000):
+        random.seed(20)
+        fleet = [generate_ovbs(f"D{i}", route_at(random.uniform(0, 86400))) for i in range(n)]
+        queries = [generate_ovbs("Primary", route_at(random.uniform(0, 86400))) for _ in range(QUERIES)]
+        results = {}
+        for backend in ("rtree", "envelope"):
+            registry = AirspaceRegistry(backend=backend)
+            for i, ovbs in enumerate(fleet):
+                registry.insert_ovbs(f"D{i}", ovbs)
+            registry.query_pairs(queries[0])  # envelope index refreshes lazily
+            results[backend] = per_query(registry, queries)
+        (rtree_ms, rtree_found), (env_ms, env_found) = results["rtree"], results["envelope"]
+        boxes = sum(len(o) for o in fleet)
+        print(f"{n:9d} {boxes:8d} {rtree_ms:11.3f} {env_ms:14.3f} {str(rtree_found == env_found):>11}")
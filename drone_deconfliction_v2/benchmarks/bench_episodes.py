@@ -0,0 +1,47 @@
+# benchmarks/bench_episodes.py
+#
+# Raw conflicts versus per-drone conflict episodes on Bezier-sampled 45°
+# traffic: record count, /analyze JSON payload size, merge time and
+# resolve_with_delay rows (the delays must match).
+#
+#   cd drone_deconfliction_v2 && python -m benchmarks.bench_episodes
+
+import json
+import random
+import time
+from app.api import conflict_dicts, episode_dicts
+from app.conflict_detector import build_conflicts, merge_episodes, narrow_phase
+from app.models import Mission, OVBBatch
+from app.optimizer import resolve_with_delay
+from benchmarks.bench_cpa import candidate_pairs
+from benchmarks.bench_oriented_boxes import diagonal_fleet
+
+if __name__ == "__main__":
+    random.seed(23)
+    batch = OVBBatch.from_ovbs(diagonal_fleet(num_drones=400, use_bezier=True))
+    rows, cols = candidate_pairs(batch)
+    found = narrow_phase(batch, batch, rows, cols)
+    conflicts = build_conflicts(batch, batch, found)
+
+    # Conflicts as each drone sees them, as DroneAgent.conflicts would hold them
+    per_drone = {}
+    for owner, c in zip(batch.drone_index[found.ia].tolist(), conflicts):
+        per_drone.setdefault(batch.drone_ids[owner], []).append(c)
+
+    start = time.perf_counter()
+    episodes = {d: merge_episodes(cs) for d, cs in per_drone.items()}
+    merge_ms = (time.perf_counter() - start) * 1e3
+
+    raw_bytes = sum(len(json.dumps(conflict_dicts(cs))) for cs in per_drone.values())
+    episode_bytes = sum(len(json.dumps(episode_dicts(es))) for es in episodes.values())
+    mismatched = sum(
+        resolve_with_delay(Mission(d, []), cs) != resolve_with_delay(Mission(d, []), episodes[d])
+        for d, cs in per_drone.items()
+    )
+    n_episodes = sum(len(es) for es in episodes.values())
+
+    print(f"{len(batch)} OVBs, {len(per_drone)} drones in conflict")
+    print(f"{'':>10} {'records':>9} {'JSON (KB)':>10}")
+    print(f"{'raw':>10} {len(conflicts):9d} {raw_bytes / 1024:10.1f}")
+    print(f"{'episodes':>10} {n_episodes:9d} {episode_bytes / 1024:10.1f}")
+    print(f"merge time {merge_ms:.1f} ms, resolve_with_delay mismatches: {mismatched}")
@@ -0,0 +1,40 @@
+# benchmarks/bench_fleet_detector.py
+#
+# Fleet-wide conflict check: one check_conflict_against call per agent on a
+# shared index versus FleetDetector.check_all with 1, 2 and 4 workers.
+#
+#   cd drone_deconfliction_v2 && python -m benchmarks.bench_fleet_detector
+
+import random
+import time
+from app.agent import DroneAgent
+from app.airspace import AirspaceRegistry
+from app.fleet_detector import FleetDetector
+from app.models import Mission
+from benchmarks.bench_broad_phase import delivery_route
+
+
+def per_agent(agents):
+    airspace = AirspaceRegistry()
+    for agent in agents:
+        airspace.insert_ovbs(agent.mission.id, agent.ovbs)
+    for agent in agents:
+        agent.check_conflict_against(airspace.index, airspace.id_map, exclude_ids=[agent.mission.id])
+    return sum(len(a.conflicts) for a in agents)
+
+
+if __name__ == "__main__":
+    random.seed(13)
+    agents = [DroneAgent(Mission(f"Drone_{i}", delivery_route())) for i in range(5000)]
+    print(f"{len(agents)} agents, {sum(len(a.ovbs) for a in agents)} boxes\n")
+
+    print(f"{'method':>22} {'time (s)':>9} {'conflicts':>10}")
+    start = time.perf_counter()
+    count = per_agent(agents)
+    print(f"{'per-agent loop':>22} {time.perf_counter() - start:9.3f} {count:10d}")
+    for workers in (1, 2, 4):
+        with FleetDetector() as detector:
+            start = time.perf_counter()
+            found = detector.check_all(agents, workers=workers)
+            elapsed = time.perf_counter() - start
+        print(f"{f'check_all, {workers} worker(s)':>22} {elapsed:9.3f} {sum(map(len, found.values())):10d}")
@@ -0,0 +1,51 @@
+# benchmarks/bench_horizon.py
+#
+# A simulated day of operations: 200 new delivery missions every 10 minutes,
+# each starting within the next hour. Live box count and mean query time of
+# the unbounded AirspaceRegistry versus HorizonRegistry advancing with "now".
+#
+#   cd drone_deconfliction_v2 && python -m benchmarks.bench_horizon
+
+import random
+import time
+from app.airspace import AirspaceRegistry, HorizonRegistry
+from app.models import Waypoint
+from app.trajectory_model import generate_ovbs
+from benchmarks.bench_broad_phase import delivery_route
+
+STEP = 600.0
+STEPS = 144
+
+
+def route_at(start):
+    route = delivery_route(20)
+    shift = start - route[0].t
+    return [Waypoint(wp.x, wp.y, wp.z, wp.t + shift) for wp in route]
+
+
+def run(registry, horizon):
+    random.seed(19)
+    query_time, queries = 0.0, 0
+    for step in range(STEPS):
+        now = step * STEP
+        if horizon:
+            registry.advance(now)
+        for i in range(200):
+            registry.insert_ovbs(f"D{step}_{i}", generate_ovbs(f"D{step}_{i}", route_at(now + random.uniform(0, 3600))))
+        for _ in range(20):
+            primary = generate_ovbs("Primary", route_at(now + random.uniform(0, 3600)))
+            start = time.perf_counter()
+            registry.query_pairs(primary)
+            query_time += time.perf_counter() - start
+            queries += 1
+    return registry.box_count, query_time / queries * 1e3
+
+
+if __name__ == "__main__":
+    print(f"{'registry':>10} {'live boxes':>11} {'query (ms)':>11}")
+    boxes, ms = run(AirspaceRegistry(), horizon=False)
+    print(f"{'unbounded':>10} {boxes:11d} {ms:11.3f}")
+    horizon = HorizonRegistry(bucket_seconds=300.0, retention=600.0, hot_horizon=1800.0)
+    boxes, ms = run(horizon, horizon=True)
+    print(f"{'horizon':>10} {boxes:11d} {ms:11.3f}")
+    print(horizon.stats())
@@ -0,0 +1,112 @@
+# benchmarks/bench_models.py
+#
+# Memory of the core models for a 10,000-drone fleet with 20 waypoints each:
+# the previous __dict__-backed dataclasses versus the slotted, frozen ones,
+# Missions holding one (n, 4) waypoint array, and OVBBatch columns. Also
+# times DroneAgent-style delay application, per waypoint versus one add.
+#
+#   cd drone_deconfliction_v2 && python -m benchmarks.bench_models
+
+import random
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import List, Tuple
+from app.models import OVB, Mission, Waypoint
+from app.trajectory_model import generate_ovbs_batch, waypoints_to_array
+from benchmarks.bench_broad_phase import delivery_route
+
+NUM_DRONES = 10000
+NUM_WAYPOINTS = 20
+
+
+@dataclass
+class LegacyWaypoint:
+    x: float
+    y: float
+    z: float
+    t: float
+
+
+@dataclass
+class LegacyOVB:
+    drone_id: str
+    center: Tuple[float, float, float]
+    length: float
+    width: float
+    height: float
+    heading: float
+    speed: float
+    entry_time: float
+    exit_time: float
+
+
+@dataclass
+class LegacyMission:
+    id: str
+    waypoints: List[LegacyWaypoint]
+    priority: int = 1
+    delay: float = 0.0
+
+
+def box_fields(batch):
+    """Per-box constructor arguments, as fresh Python objects."""
+    ids = [batch.drone_ids[i] for i in batch.drone_index.tolist()]
+    centers = [tuple(c) for c in batch.centers.tolist()]
+    return zip(ids, centers, *(getattr(batch, name).tolist() for name in batch.COLUMNS))
+
+
+def measure(build):
+    """(object built, bytes it allocated)."""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    built = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return built, after - before
+
+
+if __name__ == "__main__":
+    random.seed(25)
+    rows = [waypoints_to_array(delivery_route(num=NUM_WAYPOINTS)) for _ in range(NUM_DRONES)]
+    n_wps = NUM_DRONES * NUM_WAYPOINTS
+
+    # Every variant allocates its own floats, as when parsed from a request.
+    # Both waypoint-object variants are measured as bare per-drone lists
+    legacy_wps, legacy_wp = measure(lambda: [[LegacyWaypoint(*wp) for wp in r.tolist()] for r in rows])
+    legacy_missions = [LegacyMission(f"D{i}", wps) for i, wps in enumerate(legacy_wps)]
+    slotted_wps, slotted_wp = measure(lambda: [[Waypoint(*wp) for wp in r.tolist()] for r in rows])
+    del slotted_wps
+    missions, array_wp = measure(lambda: [Mission(f"D{i}", r) for i, r in enumerate(rows)])
+
+    batches = [generate_ovbs_batch(r, f"D{i}") for i, r in enumerate(rows)]
+    n_ovbs = sum(len(b) for b in batches)
+    legacy_ovbs, legacy_ovb = measure(lambda: [LegacyOVB(*f) for b in batches for f in box_fields(b)])
+    del legacy_ovbs
+    slotted_ovbs, slotted_ovb = measure(lambda: [OVB(*f) for b in batches for f in box_fields(b)])
+    del slotted_ovbs
+    columns = sum(
+        b.drone_index.nbytes + b.centers.nbytes + sum(getattr(b, c).nbytes for c in b.COLUMNS)
+        for b in batches
+    )
+
+    print(f"{NUM_DRONES} missions, {n_wps} waypoints, {n_ovbs} OVBs")
+    print(f"{'':>28} {'bytes/waypoint':>15}")
+    print(f"{'dataclass (before)':>28} {legacy_wp / n_wps:15.1f}")
+    print(f"{'slotted, frozen':>28} {slotted_wp / n_wps:15.1f}")
+    print(f"{'Mission (incl. object)':>28} {array_wp / n_wps:15.1f}")
+    print(f"{'':>28} {'bytes/OVB':>15}")
+    print(f"{'dataclass (before)':>28} {legacy_ovb / n_ovbs:15.1f}")
+    print(f"{'slotted, frozen':>28} {slotted_ovb / n_ovbs:15.1f}")
+    print(f"{'OVBBatch columns':>28} {columns / n_ovbs:15.1f}")
+
+    start = time.perf_counter()
+    for m in legacy_missions:
+        for wp in m.waypoints:
+            wp.t += 5.0
+    loop_s = time.perf_counter() - start
+    start = time.perf_counter()
+    for m in missions:
+        m.shift_times(5.0)
+    add_s = time.perf_counter() - start
+    print(f"\ndelay all missions: per-waypoint loop {loop_s * 1e3:.1f} ms, shift_times {add_s * 1e3:.1f} ms")
@@ -0,0 +1,117 @@
+# benchmarks/bench_oriented_boxes.py
+#
+# Candidate and conflict counts on the 45° traffic of
+# simulate_agents.generate_random_mission for three footprint models:
+#
+#   heading ignored  legacy behaviour, length always laid along x
+#   AABB only        conservative hull of the rotated box, no narrow SAT test
+#   AABB + SAT       rotated hulls in the index, oriented-box test on pairs
+#
+# Counts go up, not down, against the legacy footprint: it laid the length
+# along x whatever the heading, so a 45° leg's box covered ground the drone
+# never flies and left out ground it does, and real overlaps were missed.
+# The run checks every footprint test against shapely polygons of the
+# rotated boxes: the SAT test must keep every true overlap, and the legacy
+# test's misses are counted.
+#
+#   cd drone_deconfliction_v2 && python -m benchmarks.bench_oriented_boxes
+
+import math
+import random
+import time
+from dataclasses import replace
+from shapely.geometry import Polygon
+from app.conflict_detector import boxes_overlap_2d, conflicts_from_pairs
+from app.models import OVBBatch
+from app.trajectory_model import generate_ovbs
+from app.utils.spatial_index import build_spatial_index, spatial_query
+from simulate_agents import generate_random_mission
+
+
+def diagonal_fleet(num_drones=200, use_bezier=False):
+    ovbs = []
+    for i in range(num_drones):
+        mission = generate_random_mission(
+            f"Drone_{i}",
+            x0=random.uniform(-300, 300),
+            y0=random.uniform(-300, 300),
+            z0=random.uniform(90, 110),
+            t0=random.uniform(0, 120)
+        )
+        ovbs.extend(generate_ovbs(mission.id, mission.waypoints, use_bezier=use_bezier))
+    return ovbs
+
+
+def as_hull(ovb):
+    """The rotated box replaced by its axis-aligned hull."""
+    c, s = abs(math.cos(ovb.heading)), abs(math.sin(ovb.heading))
+    return replace(
+        ovb,
+        heading=0.0,
+        length=c * ovb.length + s * ovb.width,
+        width=s * ovb.length + c * ovb.width
+    )
+
+
+def footprint(ovb):
+    """The rotated box as a shapely polygon, the ground truth for overlap."""
+    c, s = math.cos(ovb.heading), math.sin(ovb.heading)
+    hl, hw = ovb.length / 2, ovb.width / 2
+    x, y = ovb.center[0], ovb.center[1]
+    return Polygon([
+        (x + c * u - s * v, y + s * u + c * v)
+        for u, v in ((hl, hw), (-hl, hw), (-hl, -hw), (hl, -hw))
+    ])
+
+
+def candidate_pairs(indexed):
+    idx, id_map = build_spatial_index(indexed)
+    return [
+        (i, cid) for i, ovb in enumerate(indexed)
+        for cid in spatial_query(ovb, idx) if id_map[cid].drone_id != ovb.drone_id
+    ]
+
+
+def check_footprints(oriented, legacy):
+    """
+    (true overlaps, SAT misses, legacy misses) over the candidates of the
+    hull index. A hull contains its box, so every true overlap is a candidate.
+    """
+    polygons = [footprint(ovb) for ovb in oriented]
+    truth = [(i, j) for i, j in candidate_pairs([as_hull(ovb) for ovb in oriented])
+             if polygons[i].intersects(polygons[j])]
+    sat_misses = sum(not boxes_overlap_2d(oriented[i], oriented[j]) for i, j in truth)
+    legacy_misses = sum(not boxes_overlap_2d(legacy[i], legacy[j]) for i, j in truth)
+    return len(truth), sat_misses, legacy_misses
+
+
+def run(indexed, checked):
+    start = time.perf_counter()
+    pairs = candidate_pairs(indexed)
+    rows, cols = [p[0] for p in pairs], [p[1] for p in pairs]
+    batch = OVBBatch.from_ovbs(checked)
+    conflicts = conflicts_from_pairs(batch, batch, rows, cols)
+    return time.perf_counter() - start, len(rows), len(conflicts)
+
+
+if __name__ == "__main__":
+    for use_bezier in (False, True):
+        random.seed(11)
+        oriented = diagonal_fleet(use_bezier=use_bezier)
+        legacy = [replace(ovb, heading=0.0) for ovb in oriented]
+        hulls = [as_hull(ovb) for ovb in oriented]
+
+        legs = "Bezier-sampled" if use_bezier else "straight"
+        print(f"\n{len(oriented)} OVBs, {legs} legs at ~45°")
+        print(f"{'footprint':>16} {'time (s)':>9} {'candidates':>11} {'conflicts':>10}")
+        for name, indexed, checked in (
+            ("heading ignored", legacy, legacy),
+            ("AABB only", hulls, hulls),
+            ("AABB + SAT", oriented, oriented),
+        ):
+            elapsed, candidates, conflicts = run(indexed, checked)
+            print(f"{name:>16} {elapsed:9.3f} {candidates:11d} {conflicts:10d}")
+
+        truth, sat_misses, legacy_misses = check_footprints(oriented, legacy)
+        print(f"shapely: {truth} overlapping footprints, SAT misses {sat_misses}, heading ignored misses {legacy_misses}")
+        assert sat_misses == 0, "oriented-box test dropped a true footprint overlap"
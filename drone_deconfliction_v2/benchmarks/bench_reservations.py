@@ -0,0 +1,41 @@
+# benchmarks/bench_reservations.py
+#
+# Admission check of one new delivery route against N reserved missions:
+# voxel reservation table versus the 4D R-tree of AirspaceRegistry, plus
+# the table's voxel count and memory.
+#
+#   cd drone_deconfliction_v2 && python -m benchmarks.bench_reservations
+
+import random
+import time
+from app.airspace import AirspaceRegistry
+from app.reservations import ReservationTable
+from app.trajectory_model import generate_ovbs
+from benchmarks.bench_broad_phase import delivery_route
+
+QUERIES = 200
+
+
+def per_query(check, queries):
+    start = time.perf_counter()
+    found = sum(len(check(ovbs)) for ovbs in queries)
+    return (time.perf_counter() - start) / len(queries) * 1e3, found
+
+
+if __name__ == "__main__":
+    print(f"{'missions':>9} {'rtree (ms)':>11} {'voxels (ms)':>12} {'candidates':>11} {'voxels':>9} {'MB':>7}")
+    for n in (1000, 5000, 20000):
+        random.seed(18)
+        fleet = [generate_ovbs(f"D{i}", delivery_route(20)) for i in range(n)]
+        queries = [generate_ovbs("Primary", delivery_route(20)) for _ in range(QUERIES)]
+        registry, table = AirspaceRegistry(), ReservationTable()
+        for i, ovbs in enumerate(fleet):
+            registry.insert_ovbs(f"D{i}", ovbs)
+            table.reserve(f"D{i}", ovbs)
+
+        rtree_ms, rtree_found = per_query(lambda ovbs: registry.query_pairs(ovbs)[1], queries)
+        voxel_ms, voxel_found = per_query(lambda ovbs: table.query_pairs(ovbs)[1], queries)
+        assert rtree_found == voxel_found
+        stats = table.stats()
+        print(f"{n:9d} {rtree_ms:11.3f} {voxel_ms:12.3f} {voxel_found:11d} "
+              f"{stats['voxels']:9d} {stats['memory_bytes'] / 2**20:7.1f}")
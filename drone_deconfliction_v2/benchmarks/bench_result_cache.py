@@ -0,0 +1,49 @@
+# benchmarks/bench_result_cache.py
+#
+# /analyze time for 1,000 inline traffic drones: cold, resubmitted unchanged,
+# and resubmitted with one conflicting traffic drone edited, versus
+# use_cache=false. The first CROSSERS drones fly the primary's route a few
+# seconds apart, so cached conflict pairs are exercised and checked against
+# the uncached counts.
+#
+#   cd drone_deconfliction_v2 && python -m benchmarks.bench_result_cache
+
+import random
+import time
+from fastapi.testclient import TestClient
+from app.api import app
+from benchmarks.bench_broad_phase import delivery_route
+
+CROSSERS = 20
+
+
+def as_dicts(route, dt=0.0):
+    return [{"x": wp.x, "y": wp.y, "z": wp.z, "t": wp.t + dt} for wp in route]
+
+
+def timed(client, body):
+    start = time.perf_counter()
+    res = client.post("/analyze?raw=true", json=body)
+    return time.perf_counter() - start, len(res.json()["conflicts"])
+
+
+if __name__ == "__main__":
+    random.seed(17)
+    client = TestClient(app)
+    primary = delivery_route(20)
+    traffic = {f"SimDrone_{i}": as_dicts(primary, random.uniform(-20, 20)) for i in range(CROSSERS)}
+    traffic.update({f"SimDrone_{i}": as_dicts(delivery_route(20)) for i in range(CROSSERS, 1000)})
+    body = {"mission": {"waypoints": as_dicts(primary), "buffer": 20.0}, "simulated_drones": traffic}
+
+    print(f"{'request':>18} {'time (s)':>9} {'conflicts':>10}")
+    expected = None
+    for name in ("uncached", "cold", "unchanged", "one edit, uncached", "one edit"):
+        if name == "one edit, uncached":
+            traffic["SimDrone_0"][5]["x"] += 25.0  # a drone with cached conflicts
+        elapsed, count = timed(client, {**body, "use_cache": not name.endswith("uncached")})
+        print(f"{name:>18} {elapsed:9.3f} {count:10d}")
+        if name.endswith("uncached"):
+            expected = count
+        else:
+            assert count == expected, f"{name}: {count} cached conflicts, {expected} uncached"
+    print(client.get("/cache").json())
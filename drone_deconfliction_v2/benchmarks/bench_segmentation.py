@@ -0,0 +1,80 @@
+# benchmarks/bench_segmentation.py
+#
+# Box count, swept volume and index throughput for a few adaptive
+# segmentation settings, to tune max_length / max_duration / merge_heading_tol.
+#
+#   cd drone_deconfliction_v2 && python -m benchmarks.bench_segmentation
+
+import math
+import random
+import time
+from app.models import OVBBatch, Waypoint
+from app.trajectory_model import box_volumes, detect_conflicts, generate_ovbs
+from app.utils.spatial_index import build_spatial_index, spatial_query
+
+SETTINGS = [
+    ("plain legs", False, {}),
+    ("Bezier", True, {}),
+    ("Bezier, merge 5°", True, {"merge_heading_tol": math.radians(5)}),
+    ("Bezier, merge 15°", True, {"merge_heading_tol": math.radians(15)}),
+    ("legs, split 50 m", False, {"max_length": 50.0}),
+    ("legs, split 50 m / 5 s", False, {"max_length": 50.0, "max_duration": 5.0}),
+    ("Bezier, merge 15°, split 50 m", True, {"merge_heading_tol": math.radians(15), "max_length": 50.0}),
+]
+
+
+def random_route(num=6):
+    """Long legs with sharp turns, like a delivery route between depots."""
+    x, y, t = random.uniform(-1000, 1000), random.uniform(-1000, 1000), random.uniform(0, 300)
+    wps = [Waypoint(x, y, 100.0, t)]
+    for _ in range(num - 1):
+        heading = random.uniform(-math.pi, math.pi)
+        leg = random.uniform(80, 400)
+        x, y = x + leg * math.cos(heading), y + leg * math.sin(heading)
+        t += leg / random.uniform(8, 15)
+        wps.append(Waypoint(x, y, 100.0 + random.uniform(-10, 10), t))
+    return wps
+
+
+def climb_descent_check():
+    """
+    A straight leg that climbs 100 m and comes back down, crossed at the top
+    of the climb: merging must keep the apex, or the chord's box sits at the
+    ground and the conflict is lost.
+    """
+    climb = [Waypoint(0, 0, 0, 0), Waypoint(100, 0, 100, 10), Waypoint(200, 0, 0, 20)]
+    crossing = generate_ovbs("B", [Waypoint(50, -100, 50, 0), Waypoint(50, 100, 50, 10)])
+    return [
+        (name, len(detect_conflicts(generate_ovbs("A", climb, **options), crossing)))
+        for name, options in [("no merge", {}), ("merge 0.1 rad", {"merge_heading_tol": 0.1})]
+    ]
+
+
+def run(routes, use_bezier, options):
+    ovbs = []
+    for drone_id, wps in routes.items():
+        ovbs.extend(generate_ovbs(drone_id, wps, use_bezier=use_bezier, **options))
+    volume, hull_volume = box_volumes(OVBBatch.from_ovbs(ovbs))
+
+    start = time.perf_counter()
+    idx, id_map = build_spatial_index(ovbs)
+    candidates = sum(
+        id_map[cid].drone_id != ovb.drone_id
+        for ovb in ovbs
+        for cid in spatial_query(ovb, idx)
+    )
+    return len(ovbs), volume, hull_volume, candidates, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    random.seed(5)
+    routes = {f"Drone_{i}": random_route() for i in range(300)}
+    print(f"{'setting':>30} {'boxes':>7} {'volume (m³)':>12} {'hull vol (m³)':>14} {'candidates':>11} {'index (s)':>10}")
+    for name, use_bezier, options in SETTINGS:
+        boxes, volume, hull_volume, candidates, elapsed = run(routes, use_bezier, options)
+        print(f"{name:>30} {boxes:7d} {volume:12.3e} {hull_volume:14.3e} {candidates:11d} {elapsed:10.3f}")
+
+    print()
+    print("climb/descent crossed at the apex (conflicts must match):")
+    for name, count in climb_descent_check():
+        print(f"{name:>30} {count:7d}")
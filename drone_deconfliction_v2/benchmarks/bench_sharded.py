@@ -0,0 +1,47 @@
+# benchmarks/bench_sharded.py
+#
+# Wall time of tile-sharded detection for 1, 2, 4 and 8 worker processes on
+# a city-wide fleet checked against itself, and whether each run reproduces
+# the single-core detect_serial result exactly.
+#
+#   cd drone_deconfliction_v2 && python -m benchmarks.bench_sharded
+
+import os
+import random
+import time
+from app.models import OVBBatch
+from app.sharded_detector import ShardedDetector, detect_serial
+from app.trajectory_model import generate_ovbs
+from benchmarks.bench_broad_phase import delivery_route
+
+WORKERS = [1, 2, 4, 8]
+
+
+def timed(fn, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+if __name__ == "__main__":
+    random.seed(12)
+    ovbs = []
+    for i in range(10000):
+        ovbs.extend(generate_ovbs(f"Drone_{i}", delivery_route()))
+    fleet = OVBBatch.from_ovbs(ovbs)
+    print(f"{len(fleet)} boxes, {os.cpu_count()} CPUs\n")
+
+    reference, serial = timed(lambda: detect_serial(fleet, fleet, 5.0, 2.0))
+    print(f"{'workers':>8} {'time (s)':>9} {'vs serial':>10} {'vs 1 worker':>12} {'conflicts':>10} {'exact':>6}")
+    print(f"{'serial':>8} {serial:9.3f} {1.0:10.2f} {'-':>12} {len(reference):10d} {'-':>6}")
+    single = None
+    for workers in WORKERS:
+        with ShardedDetector(tile_size=500.0, workers=workers) as detector:
+            detector.detect(fleet, fleet, 5.0, 2.0)  # start the pool outside the timing
+            found, elapsed = timed(lambda: detector.detect(fleet, fleet, 5.0, 2.0))
+        single = single or elapsed
+        print(f"{workers:8d} {elapsed:9.3f} {serial / elapsed:10.2f} {single / elapsed:12.2f} "
+              f"{len(found):10d} {str(found == reference):>6}")
@@ -0,0 +1,51 @@
+# benchmarks/bench_spatial_index.py
+#
+# Candidate counts of the 2D vs 4D R-tree on a dense corridor where every
+# drone flies the same ground track at a different altitude and start time.
+#
+#   cd drone_deconfliction_v2 && python -m benchmarks.bench_spatial_index
+
+import random
+import time
+from app.conflict_detector import conflicts_from_pairs
+from app.models import OVBBatch, Waypoint
+from app.trajectory_model import generate_ovbs
+from app.utils.spatial_index import build_spatial_index, spatial_query
+
+
+def corridor_fleet(num_drones=300, num_wps=10, spacing=60.0, leg_time=8.0):
+    ovbs = []
+    for i in range(num_drones):
+        z = 60 + 30 * random.randint(0, 5)       # six flight levels
+        t0 = random.uniform(0, 600)               # ten-minute departure window
+        wps = [Waypoint(k * spacing, 0.0, z, t0 + k * leg_time) for k in range(num_wps)]
+        ovbs.extend(generate_ovbs(f"Drone_{i}", wps))
+    return ovbs
+
+
+def run(dimension, ovbs, batch):
+    start = time.perf_counter()
+    idx, id_map = build_spatial_index(ovbs, dimension=dimension)
+    build_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    rows, cols = [], []
+    for i, ovb in enumerate(ovbs):
+        for cid in spatial_query(ovb, idx):
+            if id_map[cid].drone_id != ovb.drone_id:
+                rows.append(i)
+                cols.append(cid)
+    conflicts = conflicts_from_pairs(batch, batch, rows, cols)
+    query_s = time.perf_counter() - start
+    return build_s, query_s, len(rows), len(conflicts)
+
+
+if __name__ == "__main__":
+    random.seed(7)
+    ovbs = corridor_fleet()
+    batch = OVBBatch.from_ovbs(ovbs)
+    print(f"{len(ovbs)} OVBs in corridor")
+    print(f"{'index':>6} {'build (s)':>10} {'query+check (s)':>16} {'candidates':>11} {'conflicts':>10}")
+    for dim in (2, 3, 4):
+        build_s, query_s, candidates, conflicts = run(dim, ovbs, batch)
+        print(f"{dim}D".rjust(6), f"{build_s:10.3f} {query_s:16.3f} {candidates:11d} {conflicts:10d}")
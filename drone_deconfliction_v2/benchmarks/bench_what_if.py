@@ -0,0 +1,52 @@
+# benchmarks/bench_what_if.py
+#
+# 13 delays x 5 altitude offsets for one route against 2,000 traffic drones:
+# rebuilding and re-checking every shifted route versus sweep_offsets, which
+# shifts the OVB arrays and checks all variants in one pass.
+#
+#   cd drone_deconfliction_v2 && python -m benchmarks.bench_what_if
+
+import random
+import time
+import numpy as np
+from app.models import Waypoint
+from app.trajectory_model import generate_ovbs_batch, waypoints_to_array
+from app.conflict_detector import narrow_phase
+from app.utils.broad_phase import bounds_array, sweep_pairs
+from app.what_if import sweep_offsets
+from benchmarks.bench_broad_phase import delivery_route
+
+DELAYS = [float(d) for d in range(0, 121, 10)]
+ALTITUDES = [-40.0, -20.0, 0.0, 20.0, 40.0]
+
+
+def per_variant(route, traffic):
+    counts = []
+    for delay in DELAYS:
+        for dz in ALTITUDES:
+            shifted = [Waypoint(wp.x, wp.y, wp.z + dz, wp.t + delay) for wp in route]
+            primary = generate_ovbs_batch(waypoints_to_array(shifted), "Primary")
+            rows, cols = sweep_pairs(bounds_array(primary), bounds_array(traffic))
+            counts.append(len(narrow_phase(primary, traffic, rows, cols).ia))
+    return counts
+
+
+if __name__ == "__main__":
+    random.seed(21)
+    routes = [delivery_route(20) for _ in range(2000)]
+    stacked = np.concatenate([waypoints_to_array(r) for r in routes])
+    traffic = generate_ovbs_batch(stacked, [f"D{i}" for i in range(2000)], np.repeat(np.arange(2000), 20))
+    route = delivery_route(20)
+
+    start = time.perf_counter()
+    looped = per_variant(route, traffic)
+    loop_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    result = sweep_offsets(generate_ovbs_batch(waypoints_to_array(route), "Primary"), traffic, DELAYS, ALTITUDES)
+    sweep_s = time.perf_counter() - start
+
+    print(f"{len(looped)} variants, {len(traffic)} traffic boxes")
+    print(f"per-variant loop {loop_s:.3f} s, sweep_offsets {sweep_s:.3f} s, "
+          f"same counts: {looped == [v.conflict_count for v in result.variants]}")
+    print(f"best: {result.best}")
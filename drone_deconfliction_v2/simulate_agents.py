@@ -5,7 +5,9 @@ import math
 from app.models import Waypoint, Mission
 from app.agent import DroneAgent
 from app.visualizer import plot_3d_scene
-from app.utils.spatial_index import build_spatial_index
+from app.airspace import AirspaceRegistry
+from app.scheduler import ResolutionScheduler
+from app.fleet_detector import FleetDetector
 
 
 def generate_random_mission(drone_id: str, x0=0, y0=0, z0=100, t0=0, num=8) -> Mission:
@@ -40,39 +42,40 @@ def generate_random_mission(drone_id: str, x0=0, y0=0, z0=100, t0=0, num=8) -> M
 
     return Mission(id=drone_id, waypoints=waypoints)
 
-def run_simulation(num_drones=10):
+def run_simulation(num_drones=10, broad_phase="rtree", workers=1):
     agents = {}
 
     # Step 1: Create agents
     for i in range(num_drones):
         mission = generate_random_mission(f"Drone_{i}")
-        agent = DroneAgent(mission, use_bezier=True)
+        agent = DroneAgent(mission, use_bezier=True, broad_phase=broad_phase)
         agents[agent.mission.id] = agent
 
-    # Build R-tree ONCE from all agents' OVBs
-    all_ovbs = []
-    for agent in agents.values():
-        all_ovbs.extend(agent.ovbs)
+    # Build the shared index ONCE from all agents' OVBs
+    airspace = AirspaceRegistry(backend=broad_phase)
+    for agent_id, agent in agents.items():
+        airspace.insert_ovbs(agent_id, agent.ovbs)
 
-    rtree_index, id_map = build_spatial_index(all_ovbs)
+    # Step 2: Check the whole fleet at once, each pair evaluated a single time
+    with FleetDetector() as detector:
+        detector.check_all(agents.values(), workers=workers)
+    initial = {aid: list(agent.conflicts) for aid, agent in agents.items()}
 
-    # Now check each agent against the index (excluding itself)
-    for agent_id, agent in agents.items():
-        agent.check_conflict_against(
-            rtree_index=rtree_index,
-            id_map=id_map,
-            exclude_ids=[agent_id]
-        )
+    # Step 3: Resolve in priority order, updating only the moved agents' boxes
+    schedule = ResolutionScheduler(agents.values(), airspace).run()
 
-    # Step 3: Print final status
+    # Step 4: Print final status
     print("\n🛩️ Simulation Results:")
     for aid, agent in agents.items():
-        print(f"{aid}: Delay = {agent.delay:.2f}s | Resolved = {agent.resolved} | Conflicts = {len(agent.conflicts)}")
+        print(f"{aid}: Delay = {agent.delay:.2f}s | Resolved = {agent.resolved} | "
+              f"Conflicts = {len(initial[aid])} -> {len(agent.conflicts)}")
+    print(f"Converged = {schedule.converged} after {schedule.iterations} passes "
+          f"({schedule.checks} checks)")
 
     primary_agent = agents["Drone_0"]
     others = {k: v.mission for k,v in agents.items() if k != "Drone_0"}
 
-    plot_3d_scene(primary_agent.mission, others, primary_agent.conflicts)
+    plot_3d_scene(primary_agent.mission, others, initial["Drone_0"])
 
 if __name__ == "__main__":
     run_simulation(10)
@@ -37,7 +37,9 @@ with st.spinner("Analyzing mission..."):
 # Show result
 st.success(f"🟢 Status: {output['status'].upper()}")
 if output["conflicts"]:
-    st.write(f"🚨 Total Conflicts: {len(output['conflicts'])}")
+    # One row per conflict episode (a run of box conflicts with one drone)
+    total = sum(c.get("conflict_count", 1) for c in output["conflicts"])
+    st.write(f"🚨 Total Conflicts: {total} in {len(output['conflicts'])} episodes")
     st.dataframe(pd.DataFrame(output["conflicts"]))
 else:
     st.info("✅ No conflicts detected.")
@@ -72,7 +74,7 @@ for c in output["conflicts"]:
         x=[c["location"][0]], y=[c["location"][1]], z=[c["location"][2]],
         mode='markers+text',
         marker=dict(color='red', size=6),
-        name=f"Conflict w/ {c['with']}",
+        name=f"Conflict w/ {c['with_']}",
         text=[f"t={c['time']:.1f}s"],
         textposition="top center"
     ))